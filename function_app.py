@@ -5,20 +5,42 @@ Multi-Agent Security Operations Center
 
 import azure.functions as func
 import logging
+import orjson
 
 from src.routers.investigation_router import investigation_bp
 from src.routers.analyst_router import analyst_bp
+from src.services.investigation_service import get_investigation_service
+from src.services.cosmos_service import get_cosmos_service
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
 app.register_functions(investigation_bp)
 app.register_functions(analyst_bp)
 
+# Build the service singletons (agents, OpenAI/httpx/Cosmos clients) while the
+# worker starts up instead of on the first request. Network warm-up needs the
+# host's event loop, so it runs in the warmup trigger below.
+try:
+    get_investigation_service()
+except Exception as e:
+    logging.warning("Service pre-initialization failed, deferring to first request: %s", e)
+
+@app.warm_up_trigger("warmup")
+async def warmup(warmup) -> None:
+    """
+    Runs on each new instance before it receives traffic (Premium/Dedicated plans).
+    Opens the Cosmos connection so the first request skips TLS and metadata round trips.
+    """
+    try:
+        await get_cosmos_service().warm_up()
+    except Exception as e:
+        logging.warning("Cosmos warm-up failed: %s", e)
+
 @app.route(route="health", methods=["GET"])
 def health_check(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Health check called")
     return func.HttpResponse(
-        body='{"status": "healthy", "service": "Cyderes Aegis Swarm"}',
+        body=orjson.dumps({"status": "healthy", "service": "Cyderes Aegis Swarm"}),
         status_code=200,
         mimetype="application/json"
     )
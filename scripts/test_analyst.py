@@ -3,8 +3,8 @@ Test script for Analyst Agent
 Run: python scripts/test_analyst.py
 """
 
-import requests
-import json
+import asyncio
+import httpx
 
 
 BASE_URL = "http://localhost:7071/api"
@@ -18,36 +18,40 @@ TEST_QUERIES = [
 ]
 
 
-def test_analyst_agent():
+async def run_query(client: httpx.AsyncClient, query: str) -> httpx.Response:
+    """Send a single query to the analyst endpoint"""
+    return await client.post(f"{BASE_URL}/analyze-logs", json={"query": query})
+
+
+async def test_analyst_agent():
     """Test the analyst agent with various queries"""
     print("=" * 80)
     print("ANALYST AGENT TEST SUITE")
     print("=" * 80)
     
-    for i, query in enumerate(TEST_QUERIES, 1):
+    # Queries are independent, so fire them all at once and report in order
+    async with httpx.AsyncClient(timeout=30) as client:
+        responses = await asyncio.gather(
+            *(run_query(client, query) for query in TEST_QUERIES),
+            return_exceptions=True
+        )
+    
+    for i, (query, response) in enumerate(zip(TEST_QUERIES, responses), 1):
         print(f"\n[TEST {i}] Query: {query}")
         print("-" * 80)
         
-        try:
-            response = requests.post(
-                f"{BASE_URL}/analyze-logs",
-                json={"query": query},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ Success!")
-                print(f"Generated Code:\n{result['generated_code']}\n")
-                print(f"Execution Time: {result['execution_result']['execution_time_ms']}ms")
-                print(f"Answer: {result['natural_language_answer']}")
-                print(f"Confidence: {result['confidence']}")
-            else:
-                print(f"❌ Failed: {response.status_code}")
-                print(response.text)
-                
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
+        if isinstance(response, Exception):
+            print(f"❌ Error: {str(response)}")
+        elif response.status_code == 200:
+            result = response.json()
+            print(f"✅ Success!")
+            print(f"Generated Code:\n{result['generated_code']}\n")
+            print(f"Execution Time: {result['execution_result']['execution_time_ms']}ms")
+            print(f"Answer: {result['natural_language_answer']}")
+            print(f"Confidence: {result['confidence']}")
+        else:
+            print(f"❌ Failed: {response.status_code}")
+            print(response.text)
     
     print("\n" + "=" * 80)
     print("TEST SUITE COMPLETE")
@@ -55,4 +59,4 @@ def test_analyst_agent():
 
 
 if __name__ == "__main__":
-    test_analyst_agent()
+    asyncio.run(test_analyst_agent())
@@ -41,6 +41,9 @@ def test_investigation_endpoint():
     print("🕵️  CYDERES AEGIS SWARM - INVESTIGATION TEST SUITE")
     print("=" * 80)
     
+    # One keep-alive connection for the whole suite
+    session = requests.Session()
+    
     for i, scenario in enumerate(SCENARIOS, 1):
         print(f"\n[SCENARIO {i}] {scenario['name']}")
         print("-" * 80)
@@ -49,7 +52,7 @@ def test_investigation_endpoint():
         
         try:
             # Send request to local function
-            response = requests.post(
+            response = session.post(
                 f"{BASE_URL}/investigate",
                 json=scenario['payload'],
                 timeout=60  # Give agents enough time to think/execute
@@ -4,10 +4,27 @@ Generates and executes Python/Pandas code to answer natural language queries
 """
 
 import os
-import json
+import orjson
+from functools import lru_cache
 from typing import Dict, Any
 from openai import AzureOpenAI
 
+
+@lru_cache(maxsize=1)
+def _get_client() -> AzureOpenAI:
+    """
+    Build the Azure OpenAI client once per process.
+    
+    The client owns an httpx connection pool, so sharing it keeps TLS
+    connections alive across requests instead of handshaking per agent.
+    """
+    return AzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+    )
+
+
 class AnalystAgent:
     """
     AI agent that writes Python code to analyze security logs
@@ -18,70 +35,26 @@ class AnalystAgent:
     3. Return code for execution by SecureCodeExecutor
     """
     
-    SYSTEM_PROMPT = """You are an expert cybersecurity data analyst specializing in network security logs.
-
-Your job is to write Python pandas code to answer questions about firewall logs.
+    SYSTEM_PROMPT = """You are an expert cybersecurity data analyst. Write Python pandas code to answer questions about firewall logs.
 
-**Dataset Schema:**
-The DataFrame 'df' contains these columns:
-- timestamp (str): ISO datetime format
-- source_ip (str): Source IPv4 address
-- dest_ip (str): Destination IPv4 address  
-- source_port (int): Source port number
-- dest_port (int): Destination port number
-- protocol (str): TCP or UDP
-- action (str): ALLOW or BLOCK
-- bytes_sent (int): Bytes sent by source
-- bytes_received (int): Bytes received by source
-- user_agent (str): HTTP user agent (or N/A)
-- request_path (str): HTTP path (or N/A)
-- http_status (int): HTTP status code (or 0)
-- session_id (str): Session identifier
-- alert_type (str): benign, sql_injection, brute_force, port_scan, data_exfiltration, dos_attack
+**DataFrame 'df' columns:** timestamp (str, ISO), source_ip (str), dest_ip (str), source_port (int), dest_port (int), protocol (category: TCP|UDP), action (category: ALLOW|BLOCK), bytes_sent (int), bytes_received (int), user_agent (str or N/A), request_path (str or N/A), http_status (int, 0 if none), session_id (str), alert_type (category: benign|sql_injection|brute_force|port_scan|data_exfiltration|dos_attack)
 
 **CRITICAL RULES:**
-1. The DataFrame is already loaded as 'df' - do NOT add import statements
+1. The DataFrame is already loaded as 'df' - do NOT add import statements. Also available: 'cols' (tuple of column names) and 'dtypes' (dict of column -> dtype), use them instead of df.columns / df.dtypes
 2. Store your final result in a variable called 'result'
 3. Use ONLY pandas, numpy, and datetime operations
 4. Keep code under 10 lines
 5. Handle edge cases (empty results, division by zero)
-6. Return ONLY the Python code, no explanations
-
-**Example Queries:**
-
-Query: "How many total attacks?"
-Code:
-
-result = df[df['alert_type'] != 'benign'].shape[0]
-
-
-Query: "Which IP has the most brute force attempts?"
-Code:
+6. Return ONLY executable Python code, no explanations
 
+**Example** - Query: "Which IP has the most brute force attempts?"
 brute_force_df = df[df['alert_type'] == 'brute_force']
-if len(brute_force_df) > 0:
-    result = brute_force_df['source_ip'].value_counts().head(1)
-else:
-    result = "No brute force attempts found"
-
-
-Query: "Average bytes sent in SQL injection attacks"
-Code:
-
-sql_inj = df[df['alert_type'] == 'sql_injection']
-result = sql_inj['bytes_sent'].mean() if len(sql_inj) > 0 else 0
-
-
-Now generate code for the following query. Return ONLY executable Python code, nothing else.
+result = brute_force_df['source_ip'].value_counts().head(1) if len(brute_force_df) > 0 else "No brute force attempts found"
 """
     
     def __init__(self):
-        """Initialize OpenAI client"""
-        self.client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        """Initialize OpenAI client (shared across agent instances)"""
+        self.client = _get_client()
         self.deployment = os.getenv("ANALYST_MODEL", "gpt-4o")
     
     def generate_code(self, query: str, retry_context: str = None) -> str:
@@ -169,7 +142,7 @@ Now generate code for the following query. Return ONLY executable Python code, n
             if content.startswith("```json"):
                 content = content.replace("```json", "").replace("```", "").strip()
             
-            result = json.loads(content)
+            result = orjson.loads(content)
             return result
             
         except Exception as e:
@@ -4,11 +4,48 @@ Provides context about IPs, domains, and other security indicators
 """
 
 import os
+import time
+import ipaddress
+import asyncio
 import logging
 import httpx
+import orjson
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Union
 from src.models.intel_models import IPReputationResponse
+from src.utils.http_utils import new_http_client
+
+def _mock_response(ip_address: str, record: Dict[str, Any]) -> IPReputationResponse:
+    """Build the (immutable) Mock DB response for a record"""
+    return IPReputationResponse(
+        ip_address=ip_address,
+        reputation=record["reputation"],
+        threat_score=record["threat_score"],
+        category=record["category"],
+        details=record["details"],
+        geolocation=record.get("geolocation"),
+        source="mock_db"
+    )
+
+# Returned (with the queried IP filled in) when the Mock DB has no match
+_UNKNOWN_RESPONSE = IPReputationResponse(
+    ip_address="0.0.0.0",
+    reputation="unknown",
+    threat_score=0,
+    category="unknown",
+    details="No intelligence found in internal database.",
+    source="mock_db_miss"
+)
+# Returned (with the queried IP filled in) for private, loopback and other non-routable addresses
+_BOGON_RESPONSE = IPReputationResponse(
+    ip_address="0.0.0.0",
+    reputation="benign",
+    threat_score=0,
+    category="internal_network",
+    details="Private or reserved address (RFC 1918 / special-purpose range); no public reputation exists.",
+    source="local_bogon"
+)
 
 class IntelAgent:
     """
@@ -18,6 +55,12 @@ class IntelAgent:
     2. Threat Context Enrichment
     """
 
+    # Max lookups in flight at once for a bulk request
+    BATCH_SIZE = 100
+
+    # Reputation cache bound (LRU beyond this many IPs)
+    CACHE_MAX_ENTRIES = 10000
+
     # Internal Mock DB for testing/fallback
     MOCK_DB = {
         "89.248.172.16": {
@@ -50,42 +93,147 @@ class IntelAgent:
         }
     }
 
-    def __init__(self):
+    # Mock DB ranges (CIDR), checked when there is no exact match
+    MOCK_NETWORKS = {
+        "185.220.101.0/24": {
+            "reputation": "malicious",
+            "category": "tor_exit_node",
+            "threat_score": 80,
+            "details": "Address in a known TOR exit node range. Traffic is anonymized.",
+            "geolocation": {"country": "DE", "isp": "Tor Exit Service"}
+        }
+    }
+
+    # Integer-keyed views of the Mock DB with responses prebuilt once:
+    # exact IPs, then (network, mask, template response) ranges
+    _MOCK_EXACT = {int(ipaddress.IPv4Address(ip)): _mock_response(ip, record) for ip, record in MOCK_DB.items()}
+    _MOCK_NETS = [
+        (int(net.network_address), int(net.netmask), _mock_response(str(net.network_address), record))
+        for net, record in ((ipaddress.IPv4Network(cidr), record) for cidr, record in MOCK_NETWORKS.items())
+    ]
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            http_client: Shared pooled client to send lookups through. If omitted,
+                the agent creates (and closes, in aclose) its own.
+        """
         self.api_key = os.getenv("ABUSEIPDB_API_KEY")
         self.base_url = "https://api.abuseipdb.com/api/v2"
         self.logger = logging.getLogger(__name__)
 
+        # Sent per request, so a client shared with other callers can be used as-is
+        self._headers = {'Accept': 'application/json'}
+        if self.api_key:
+            self._headers['Key'] = self.api_key
+
+        # One long-lived client so lookups reuse pooled (already TLS-negotiated) connections.
+        # HTTP/2 multiplexes concurrent lookups (lookup_ips fan-out) over a single connection
+        self._owns_client = http_client is None
+        self._client = http_client or new_http_client()
+
+        # TTL + LRU cache of lookups, plus in-flight lookups so concurrent callers share one
+        self._cache_ttl = int(os.getenv("INTEL_CACHE_TTL", "3600"))
+        self._cache: "OrderedDict[str, Tuple[float, IPReputationResponse]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def aclose(self):
+        """Close the pooled HTTP client if this agent created it (call on shutdown)"""
+        if self._owns_client:
+            await self._client.aclose()
+
     async def lookup_ip(self, ip_address) -> IPReputationResponse:
         """
-        Check IP reputation. Tries AbuseIPDB first, falls back to Mock DB.
+        Check IP reputation. Served from cache when fresh, otherwise
+        tries AbuseIPDB first and falls back to Mock DB.
         """
+        ip_address = str(ip_address)
+
+        cached = self._cache.get(ip_address)
+        if cached is not None:
+            stored_at, response = cached
+            if time.monotonic() - stored_at < self._cache_ttl:
+                self._cache.move_to_end(ip_address)
+                return response
+            del self._cache[ip_address]
+
+        # Join a lookup already in flight for this IP instead of issuing another
+        inflight = self._inflight.get(ip_address)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._lookup_and_cache(ip_address))
+            self._inflight[ip_address] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(ip_address, None))
+        return await asyncio.shield(inflight)
+
+    async def _lookup_and_cache(self, ip_address: str) -> IPReputationResponse:
+        """Uncached lookup; stores the result unless it is a fallback after an API failure"""
+        # Non-routable addresses are classified locally; no external source knows them
+        addr = ipaddress.ip_address(ip_address)
+        if addr.is_private or addr.is_loopback or addr.is_link_local or addr.is_multicast \
+                or addr.is_reserved or addr.is_unspecified:
+            response = _BOGON_RESPONSE.model_copy(update={"ip_address": addr})
+            self._store(ip_address, response)
+            return response
+
         # 1. Try AbuseIPDB if Key exists
         if self.api_key:
             try:
-                return await self._query_abuseipdb(ip_address)
+                response = await self._query_abuseipdb(ip_address)
             except Exception as e:
-                self.logger.warning(f"AbuseIPDB lookup failed for {ip_address}: {str(e)}. Using fallback.")
-        
-        # 2. Fallback to Mock DB
-        return self._query_mock_db(ip_address)
+                self.logger.warning("AbuseIPDB lookup failed for %s: %s. Using fallback.", ip_address, e)
+                # 2. Fallback to Mock DB (not cached, so the API is retried next time)
+                return self._query_mock_db(ip_address)
+        else:
+            response = self._query_mock_db(ip_address)
+
+        self._store(ip_address, response)
+        return response
+
+    def _store(self, ip_address: str, response: IPReputationResponse):
+        """Add a lookup result to the cache, evicting the least recently used entry if full"""
+        self._cache[ip_address] = (time.monotonic(), response)
+        if len(self._cache) > self.CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def lookup_ips(self, ip_addresses: List[str]) -> List[Union[IPReputationResponse, Dict[str, str]]]:
+        """
+        Check reputation for many IPs at once.
+
+        Lookups run concurrently over the shared connection pool, BATCH_SIZE
+        at a time, so N IPs cost roughly one round trip per batch instead of N.
+        A failed lookup (e.g. a malformed address) becomes an error entry for
+        that IP only; the others still return their results.
+
+        Args:
+            ip_addresses: IPs to look up (duplicates are looked up once)
+
+        Returns:
+            One IPReputationResponse, or {"ip_address", "error"} dict, per input IP, in input order
+        """
+        unique_ips = list(dict.fromkeys(ip_addresses))
+        results = {}
+        for i in range(0, len(unique_ips), self.BATCH_SIZE):
+            batch = unique_ips[i:i + self.BATCH_SIZE]
+            responses = await asyncio.gather(*(self.lookup_ip(ip) for ip in batch), return_exceptions=True)
+            for ip, response in zip(batch, responses):
+                if isinstance(response, Exception):
+                    self.logger.warning("Lookup failed for %s: %s", ip, response)
+                    response = {"ip_address": str(ip), "error": str(response)}
+                elif isinstance(response, BaseException):
+                    raise response  # Cancellation, not a per-IP failure
+                results[ip] = response
+        return [results[ip] for ip in ip_addresses]
     
     async def _query_abuseipdb(self, ip_address: str) -> IPReputationResponse:
         """Query AbuseIPDB API"""
-        url = f"{self.base_url}/check"
-        headers = {
-            'Key': self.api_key,
-            'Accept': 'application/json'
-        }
         params = {
             'ipAddress': ip_address,
             'maxAgeInDays': 90
         }
 
-        # Use httpx for async request
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params, timeout=5.0)
+        response = await self._client.get(f"{self.base_url}/check", params=params, headers=self._headers)
         response.raise_for_status()
-        data = response.json()['data']
+        data = orjson.loads(response.content)['data']
 
         # Map API response to our schema
         score = data.get('abuseConfidenceScore', 0)
@@ -113,25 +261,16 @@ class IntelAgent:
         )
     
     def _query_mock_db(self, ip_address: str) -> IPReputationResponse:
-        """Query internal Mock DB"""
-        if ip_address in self.MOCK_DB:
-            record = self.MOCK_DB[ip_address]
-            return IPReputationResponse(
-                ip_address=ip_address,
-                reputation=record["reputation"],
-                threat_score=record["threat_score"],
-                category=record["category"],
-                details=record["details"],
-                geolocation=record.get("geolocation"),
-                source="mock_db"
-            )
-        
+        """Query internal Mock DB (exact IPv4 match first, then CIDR ranges)"""
+        ip = ipaddress.ip_address(ip_address)
+        if ip.version == 4:
+            ip_int = int(ip)
+            response = self._MOCK_EXACT.get(ip_int)
+            if response is not None:
+                return response  # Frozen, so safe to share
+            for net, mask, template in self._MOCK_NETS:
+                if ip_int & mask == net:
+                    return template.model_copy(update={"ip_address": ip})
+
         # Unknown IP
-        return IPReputationResponse(
-            ip_address=ip_address,
-            reputation="unknown",
-            threat_score=0,
-            category="unknown",
-            details="No intelligence found in internal database.",
-            source="mock_db_miss"
-        )
\ No newline at end of file
+        return _UNKNOWN_RESPONSE.model_copy(update={"ip_address": ip})
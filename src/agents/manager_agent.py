@@ -6,22 +6,155 @@ Now with Recursive Decision Making (ReAct Loop)
 """
 
 import os
-import json
+import re
+import orjson
+import ipaddress
+import asyncio
 import logging
-from typing import List, Dict, Any
-from openai import AzureOpenAI
-from pydantic import BaseModel
+from typing import List, Dict, Any, Callable, Awaitable, Optional
+from openai import AsyncAzureOpenAI
+from pydantic import BaseModel, ConfigDict
 from src.models.manager_models import InvestigationPlan, ThreatVerdict, AgentTask
 from src.models.state_models import InvestigationState
+from src.agents.prompts import PLANNER_PROMPT, NEXT_STEP_PROMPT, VERDICT_PROMPT
 
 class NextStepDecision(BaseModel):
     """
     The Manager's decision on what to do next.
     """
+    model_config = ConfigDict(frozen=True)
+
     decision: str  # "continue" or "stop"
     reasoning: str
     tasks: List[AgentTask] = []
 
+# Fallback results, built once (frozen, so safe to share or model_copy per failure)
+_FALLBACK_PLAN = InvestigationPlan(
+    thought_process="Planning failed, executing fallback.",
+    tasks=[]
+)
+_STOP_DECISION = NextStepDecision(decision="stop", reasoning="", tasks=[])
+_FALLBACK_VERDICT = ThreatVerdict(
+    severity="medium",
+    confidence=0.0,
+    threat_summary="",
+    evidence=[],
+    recommended_actions=["Manual Review Required"],
+    affected_assets=[]
+)
+
+# Deterministic playbooks: alerts naming exactly one IP (and no domains) that match
+# one of these get a canned plan without an LLM call.
+_IP_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+_DOMAIN_RE = re.compile(r"\b(?:[a-z0-9-]+\.)+[a-z]{2,}\b", re.IGNORECASE)
+_PLAYBOOKS = [
+    (
+        re.compile(r"brute[\s-]?force|failed log(?:in|on)|login attempts|\bssh\b|\brdp\b", re.IGNORECASE),
+        "Brute force playbook: check the source's reputation and its login attempt volume.",
+        "How many brute force attempts came from {ip}, which request paths did it target, "
+        "and did any of them succeed (http_status 200)?"
+    ),
+    (
+        re.compile(r"port[\s-]?scan|scanning|\bnmap\b", re.IGNORECASE),
+        "Port scan playbook: check the source's reputation and how many ports it probed.",
+        "How many distinct destination ports did {ip} probe, and how many of its connections were allowed?"
+    ),
+]
+
+
+def _try_deterministic_plan(alert_text: str) -> Optional[InvestigationPlan]:
+    """
+    Build a plan without the LLM for simple single-IP alerts that match a playbook.
+
+    Returns:
+        The canned InvestigationPlan, or None if the alert needs the LLM planner
+    """
+    ips = set()
+    for candidate in _IP_RE.findall(alert_text):
+        try:
+            ips.add(str(ipaddress.IPv4Address(candidate)))
+        except ValueError:
+            continue
+    if len(ips) != 1 or _DOMAIN_RE.search(alert_text):
+        return None
+
+    ip = ips.pop()
+    for keywords, thought_process, query in _PLAYBOOKS:
+        if keywords.search(alert_text):
+            return InvestigationPlan(
+                thought_process=thought_process,
+                tasks=[
+                    AgentTask(
+                        agent="intel",
+                        action="lookup_ip",
+                        params={"ip_address": ip},
+                        reasoning="Check if the source IP is known malicious"
+                    ),
+                    AgentTask(
+                        agent="analyst",
+                        action="analyze_logs",
+                        params={"query": query.format(ip=ip)},
+                        reasoning="Measure the activity from the source IP in the firewall logs"
+                    )
+                ]
+            )
+    return None
+
+class _TaskStreamParser:
+    """
+    Incremental scanner for a streamed plan JSON document.
+
+    Feed it text deltas as they arrive; it returns each object of the
+    top-level "tasks" array as soon as that object's closing brace is seen.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = 0
+        self.last_key = None
+        self.tasks_depth = None  # Depth inside the "tasks" array, once found
+        self.object_start = None
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of text and return any task objects it completed"""
+        self.buffer += delta
+        completed = []
+        buffer = self.buffer
+        for i in range(self.pos, len(buffer)):
+            ch = buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_key = buffer[self.string_start:i]
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = i + 1
+            elif ch in "{[":
+                if ch == "[" and self.depth == 1 and self.last_key == "tasks" and self.tasks_depth is None:
+                    self.tasks_depth = 2
+                elif ch == "{" and self.depth == self.tasks_depth:
+                    self.object_start = i
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if ch == "}" and self.depth == self.tasks_depth and self.object_start is not None:
+                    completed.append(orjson.loads(buffer[self.object_start:i + 1]))
+                    self.object_start = None
+                elif ch == "]" and self.depth == 1 and self.tasks_depth == 2:
+                    self.tasks_depth = -1  # Array closed; nothing later can match
+        self.pos = len(buffer)
+        return completed
+
+
 class ManagerAgent:
     """
     Orchestrates the investigation by decomposing alerts into agent tasks
@@ -30,103 +163,8 @@ class ManagerAgent:
     Now supports iterative reasoning via the ReAct loop.
     """
 
-    SYSTEM_PROMPT_PLANNER = """You are a Senior SOC Manager. Your goal is to investigate security alerts by delegating tasks to specialized agents.
-
-**Available Agents:**
-1. **Intel Agent**:
-   - Action: `lookup_ip`
-   - Params: `{"ip_address": "8.8.8.8"}`
-   - Use for: IP reputation, threat intelligence.
-
-2. **Analyst Agent**:
-   - Action: `analyze_logs`
-   - Params: `{"query": "Count login attempts from 1.2.3.4"}`
-   - Use for: Querying firewall logs, counting events.
-
-**Goal:**
-Given an alert, create a JSON plan of tasks.
-
-**Output Format:**
-Return ONLY valid JSON matching this schema:
-{
-  "thought_process": "Brief explanation...",
-  "tasks": [
-    {
-      "agent": "intel",
-      "action": "lookup_ip",
-      "params": {"ip_address": "8.8.8.8"},
-      "reasoning": "Check if IP is known malicious"
-    },
-    {
-      "agent": "analyst",
-      "action": "analyze_logs",
-      "params": {"query": "..."},
-      "reasoning": "Check for successful attacks"
-    }
-  ]
-}
-"""
-
-    SYSTEM_PROMPT_NEXT_STEP = """You are a Senior SOC Manager conducting an iterative investigation.
-
-**Available Agents:**
-1. **Intel Agent**: IP reputation lookups
-2. **Analyst Agent**: Log analysis queries
-
-**Your Task:**
-Review the investigation so far and decide the next step.
-
-**Options:**
-1. **Continue**: More investigation needed. Provide new tasks.
-2. **Stop**: We have enough evidence. No more tasks needed.
-
-**Output Format:**
-Return ONLY valid JSON:
-{
-  "decision": "continue" or "stop",
-  "reasoning": "Why are we continuing/stopping?",
-  "tasks": [
-    {
-      "agent": "intel",
-      "action": "lookup_ip",
-      "params": {"ip_address": "..."},
-      "reasoning": "..."
-    }
-  ]
-}
-
-If decision is "stop", tasks should be an empty array [].
-"""
-
-    SYSTEM_PROMPT_VERDICT = """You are a Senior SOC Manager. Synthesize the following investigation data into a final threat verdict.
-
-**Input Data:**
-1. Original Alert
-2. Intel Findings (IP reputation)
-3. Analyst Findings (Log analysis)
-
-**Goal:**
-Determine the severity and provide a summary.
-
-- **Critical**: Confirmed malicious IP + Successful attacks or Data Exfiltration.
-- **High**: Confirmed malicious IP + High volume of failed attacks (Brute Force).
-- **Medium**: Suspicious IP + Low volume / Scanning.
-- **Low/Info**: Benign IP or standard noise.
-
-**Output Format:**
-Return ONLY valid JSON matching the ThreatVerdict schema:
-{
-  "severity": "critical|high|medium|low|info",
-  "confidence": 0.95,
-  "threat_summary": "Executive summary...",
-  "evidence": ["Evidence 1", "Evidence 2"],
-  "recommended_actions": ["Action 1", "Action 2"],
-  "affected_assets": ["1.2.3.4", "UserX"]
-}
-"""
-
     def __init__(self):
-        self.client = AzureOpenAI(
+        self.client = AsyncAzureOpenAI(
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
             azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -134,58 +172,105 @@ Return ONLY valid JSON matching the ThreatVerdict schema:
         self.deployment = os.getenv("MANAGER_MODEL", "gpt-4o")
         self.logger = logging.getLogger(__name__)
 
-    async def plan_investigation(self, alert_text: str) -> InvestigationPlan:
+        # Task fan-out limits for execute_plan
+        self.max_concurrent_tasks = int(os.getenv("MAX_CONCURRENT_AGENTS", "5"))
+        self.task_timeout = float(os.getenv("TASK_TIMEOUT_SECONDS", "30"))
+
+    async def plan_investigation(
+        self,
+        alert_text: str,
+        on_task: Optional[Callable[[AgentTask], Any]] = None
+    ) -> InvestigationPlan:
         """
         Phase 1: Initial Planning
         Ask LLM to decompose the alert into a list of tasks.
+
+        The completion is streamed. If on_task is given it is called with each
+        task as soon as its JSON object is complete, so the caller can start it
+        while the model is still writing the rest of the plan (on_task should
+        schedule work, not block). Streamed tasks are passed through as-is;
+        IP lookups are only coalesced when no on_task is given.
+
+        Simple single-IP alerts matching a known playbook skip the LLM entirely.
         """
+        plan = _try_deterministic_plan(alert_text)
+        if plan is not None:
+            self.logger.info("Using deterministic plan: %s", plan.thought_process)
+            if on_task is not None:
+                for task in plan.tasks:
+                    on_task(task)
+            return plan
+
+        streamed_tasks = []
         try:
-            response = self.client.chat.completions.create(
+            stream = await self.client.chat.completions.create(
                 model=self.deployment,
                 messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT_PLANNER},
+                    {"role": "system", "content": PLANNER_PROMPT},
                     {"role": "user", "content": f"Alert: {alert_text}"}
                 ],
                 response_format={"type": "json_object"},
-                temperature=0.1
+                temperature=0.1,
+                stream=True
             )
 
-            content = response.choices[0].message.content
-            plan_dict = json.loads(content)
-            return InvestigationPlan(**plan_dict)
+            parser = _TaskStreamParser()
+            parts = []
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                if on_task is None:
+                    continue
+                for task_dict in parser.feed(delta):
+                    task = AgentTask(**task_dict)
+                    streamed_tasks.append(task)
+                    on_task(task)
+
+            plan_dict = orjson.loads("".join(parts))
+            plan = InvestigationPlan(**plan_dict)
+            if on_task is None:
+                plan = plan.model_copy(update={"tasks": self._coalesce_ip_lookups(plan.tasks)})
+            return plan
 
         except Exception as e:
-            self.logger.error(f"Planning failed: {str(e)}")
-            return InvestigationPlan(
-                thought_process="Planning failed, executing fallback.",
-                tasks=[]
-            )
+            self.logger.error("Planning failed: %s", e)
+            # Keep whatever was already handed to on_task so the caller's view stays consistent
+            if streamed_tasks:
+                return _FALLBACK_PLAN.model_copy(update={"tasks": streamed_tasks})
+            return _FALLBACK_PLAN
 
     async def plan_next_step(self, state: InvestigationState) -> NextStepDecision:
         """
         NEW: ReAct Loop Decision
         Given the current investigation state, decide what to do next.
         """
-        # Build context from state
-        context = f"**Original Alert:** {state.alert_text}\n\n"
-        context += f"**Investigation ID:** {state.id}\n"
-        context += f"**Current Status:** {state.status}\n\n"
+        # Build context from state (collect parts, join once)
+        parts = [
+            f"**Original Alert:** {state.alert_text}\n\n",
+            f"**Investigation ID:** {state.id}\n",
+            f"**Current Status:** {state.status}\n\n"
+        ]
         
         if state.tasks_history:
-            context += "**Tasks Completed So Far:**\n"
+            parts.append("**Tasks Completed So Far:**\n")
             for idx, task in enumerate(state.tasks_history, 1):
-                context += f"{idx}. Agent: {task['agent']}, Action: {task['action']}\n"
-                context += f"   Result: {json.dumps(task['output'], indent=2)}\n\n"
+                parts.append(f"{idx}. Agent: {task['agent']}, Action: {task['action']}\n")
+                parts.append(f"   Result: {state.task_output_json(idx - 1)}\n\n")
         else:
-            context += "**No tasks executed yet.**\n\n"
+            parts.append("**No tasks executed yet.**\n\n")
 
-        context += "**What should we do next?**"
+        parts.append("**What should we do next?**")
+        context = "".join(parts)
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.deployment,
                 messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT_NEXT_STEP},
+                    {"role": "system", "content": NEXT_STEP_PROMPT},
                     {"role": "user", "content": context}
                 ],
                 response_format={"type": "json_object"},
@@ -193,37 +278,121 @@ Return ONLY valid JSON matching the ThreatVerdict schema:
             )
 
             content = response.choices[0].message.content
-            decision_dict = json.loads(content)
+            decision_dict = orjson.loads(content)
             
-            self.logger.info(f"Manager Decision: {decision_dict.get('decision')} - {decision_dict.get('reasoning')}")
+            self.logger.info("Manager Decision: %s - %s", decision_dict.get("decision"), decision_dict.get("reasoning"))
             
-            return NextStepDecision(**decision_dict)
+            decision = NextStepDecision(**decision_dict)
+            decision = decision.model_copy(update={"tasks": self._coalesce_ip_lookups(decision.tasks)})
+            return decision
 
         except Exception as e:
-            self.logger.error(f"Next step planning failed: {str(e)}")
+            self.logger.error("Next step planning failed: %s", e)
             # Fallback: Stop the loop if we can't plan
-            return NextStepDecision(
-                decision="stop",
-                reasoning=f"Planning error: {str(e)}",
-                tasks=[]
-            )
+            return _STOP_DECISION.model_copy(update={"reasoning": f"Planning error: {str(e)}"})
 
-    async def synthesize_verdict(self, alert_text: str, task_results: List[Dict[str, Any]]) -> ThreatVerdict:
+    async def execute_plan(
+        self,
+        tasks: List[AgentTask],
+        dispatch: Callable[[AgentTask], Awaitable[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a plan's tasks concurrently (they are independent of each other).
+
+        Args:
+            tasks: Tasks to run
+            dispatch: Coroutine function that routes one task to its agent
+
+        Returns:
+            One result dict per task, in task order
+        """
+        run = self._task_runner(dispatch)
+        return list(await asyncio.gather(*(run(task) for task in tasks)))
+
+    def _task_runner(
+        self,
+        dispatch: Callable[[AgentTask], Awaitable[Dict[str, Any]]]
+    ) -> Callable[[AgentTask], Awaitable[Dict[str, Any]]]:
+        """
+        Wrap dispatch with the concurrency cap and per-task timeout.
+
+        Failures are turned into error results so one task never sinks the batch.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+
+        async def run(task: AgentTask) -> Dict[str, Any]:
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(dispatch(task), timeout=self.task_timeout)
+            except asyncio.TimeoutError:
+                error = f"Task timed out after {self.task_timeout:g}s"
+            except Exception as e:
+                error = str(e)
+            self.logger.error("Task %s -> %s failed: %s", task.agent, task.action, error)
+            return {
+                "agent": task.agent,
+                "action": task.action,
+                "status": "error",
+                "error": error
+            }
+
+        return run
+
+    def _coalesce_ip_lookups(self, tasks: List[AgentTask]) -> List[AgentTask]:
+        """
+        Merge every single-IP intel lookup in a plan into one `lookup_ips` task
+        (placed where the first lookup was) so they run as one bulk request.
+        The merged task keeps the reasoning of every lookup it replaces.
+        """
+        ips = []
+        reasons = []
+        for task in tasks:
+            if task.agent == "intel" and task.action == "lookup_ip" and task.params.get("ip_address"):
+                ips.append(task.params["ip_address"])
+                reasons.append(task.reasoning)
+            elif task.agent == "intel" and task.action == "lookup_ips":
+                ips.extend(task.params.get("ip_addresses") or [])
+                reasons.append(task.reasoning)
+        if len(ips) < 2:
+            return tasks
+
+        coalesced = []
+        merged = False
+        for task in tasks:
+            if task.agent == "intel" and task.action in ("lookup_ip", "lookup_ips"):
+                if task.action == "lookup_ip" and not task.params.get("ip_address"):
+                    coalesced.append(task)  # Leave malformed tasks to report their own error
+                elif not merged:
+                    coalesced.append(AgentTask(
+                        agent="intel",
+                        action="lookup_ips",
+                        params={"ip_addresses": list(dict.fromkeys(ips))},
+                        reasoning=" ".join(dict.fromkeys(reasons))
+                    ))
+                    merged = True
+            else:
+                coalesced.append(task)
+        return coalesced
+
+    async def synthesize_verdict(self, state: InvestigationState) -> ThreatVerdict:
         """
         Phase 3: Synthesis
         Ask LLM to review all agent outputs and form a final opinion.
         """
-        context = f"Original Alert: {alert_text}\n\nTask Results:\n"
-        for res in task_results:
-            context += f"- Agent: {res.get('agent')}\n"
-            context += f"  Action: {res.get('action')}\n"
-            context += f"  Output: {json.dumps(res.get('output'))}\n\n"
+        parts = [f"Original Alert: {state.alert_text}\n\nTask Results:\n"]
+        for idx, res in enumerate(state.tasks_history):
+            parts.append(
+                f"- Agent: {res.get('agent')}\n"
+                f"  Action: {res.get('action')}\n"
+                f"  Output: {state.task_output_json(idx)}\n\n"
+            )
+        context = "".join(parts)
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.deployment,
                 messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT_VERDICT},
+                    {"role": "system", "content": VERDICT_PROMPT},
                     {"role": "user", "content": context}
                 ],
                 response_format={"type": "json_object"},
@@ -231,16 +400,11 @@ Return ONLY valid JSON matching the ThreatVerdict schema:
             )
 
             content = response.choices[0].message.content
-            verdict_dict = json.loads(content)
+            verdict_dict = orjson.loads(content)
             return ThreatVerdict(**verdict_dict)
 
         except Exception as e:
-            self.logger.error(f"Synthesis failed: {str(e)}")
-            return ThreatVerdict(
-                severity="medium",
-                confidence=0.0,
-                threat_summary=f"Automated synthesis failed. Error: {str(e)}",
-                evidence=[],
-                recommended_actions=["Manual Review Required"],
-                affected_assets=[]
+            self.logger.error("Synthesis failed: %s", e)
+            return _FALLBACK_VERDICT.model_copy(
+                update={"threat_summary": f"Automated synthesis failed. Error: {str(e)}"}
             )
@@ -14,8 +14,8 @@ class AnalystRequest(BaseModel):
         examples=["How many SQL injection attempts?"]
     )
     csv_path: str = Field(
-        default="data/raw/firewall_logs.csv",
-        description="Path to the firewall logs CSV file"
+        default="data/raw/firewall_logs_0_50000.csv.gz",
+        description="Path to the firewall logs CSV file (plain or gzip-compressed)"
     )
 
 class CodeExecutionResult(BaseModel):
@@ -3,7 +3,7 @@ Pydantic models for Intel Agent
 Threat intelligence and IP reputation schemas
 """
 
-from pydantic import BaseModel, Field, IPvAnyAddress
+from pydantic import BaseModel, ConfigDict, Field, IPvAnyAddress
 from typing import Literal, Optional, List, Dict, Any
 from datetime import datetime
 
@@ -13,6 +13,8 @@ class IPReputationRequest(BaseModel):
 
 class IPReputationResponse(BaseModel):
     """IP reputation lookup result"""
+    model_config = ConfigDict(frozen=True)  # Shared between callers (cache, prebuilt mock responses)
+
     ip_address: IPvAnyAddress
     reputation: Literal["malicious", "suspicious", "benign", "unknown"] = Field(
         ..., 
@@ -2,7 +2,7 @@
 Manager Models - Schemas for Orchestration & Decision Making
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal, List, Dict, Any
 
 class InvestigationRequest(BaseModel):
@@ -13,6 +13,8 @@ class InvestigationRequest(BaseModel):
 
 class AgentTask(BaseModel):
     """A single unit of work delegated to a sub-agent"""
+    model_config = ConfigDict(frozen=True)
+
     agent: Literal["intel", "analyst"] = Field(..., description="Which agent to call")
     action: str = Field(..., description="The function/capability to invoke")
     params: Dict[str, Any] = Field(..., description="Arguments for the action")
@@ -20,11 +22,15 @@ class AgentTask(BaseModel):
 
 class InvestigationPlan(BaseModel):
     """The manager's strategy for investigating the alert"""
+    model_config = ConfigDict(frozen=True)
+
     tasks: List[AgentTask] = Field(..., description="Ordered list of tasks to execute")
     thought_process: str = Field(..., description="Explanation of the strategy")
 
 class ThreatVerdict(BaseModel):
     """Final conclusion of the investigation"""
+    model_config = ConfigDict(frozen=True)
+
     severity: Literal["critical", "high", "medium", "low", "info"]
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence in the verdict (0-1)")
     threat_summary: str = Field(..., description="Executive summary of findings")
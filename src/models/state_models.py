@@ -7,10 +7,15 @@ This defines exactly what an 'Investigation' looks like when stored in Cosmos DB
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+from pydantic_core import to_json
 
 from src.models.manager_models import InvestigationPlan, ThreatVerdict, AgentTask
 
+def _utcnow_iso() -> str:
+    """Current UTC time as an ISO 8601 string"""
+    return datetime.now(timezone.utc).isoformat()
+
 class InvestigationState(BaseModel):
     """
     The Master Document stored in Cosmos DB.
@@ -26,8 +31,8 @@ class InvestigationState(BaseModel):
     status: str = "running"  # running, completed, failed
     
     # We store these as ISO strings directly to match Cosmos DB format
-    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
-    updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    created_at: str = Field(default_factory=_utcnow_iso)
+    updated_at: str = Field(default_factory=_utcnow_iso)
     
     # ---------------------------------------------------------
     # The Brain (Manager)
@@ -38,29 +43,44 @@ class InvestigationState(BaseModel):
     # ---------------------------------------------------------
     # The Evidence (accumulated from agents)
     # ---------------------------------------------------------
+    # Task outputs may hold agent response models as-is; they are serialized
+    # together with the state in the same pydantic-core pass
     tasks_history: List[Dict[str, Any]] = []
 
+    # Serialized task outputs for LLM context, by tasks_history index (in memory only, not stored)
+    _output_json: Dict[int, str] = PrivateAttr(default_factory=dict)
+
     # ---------------------------------------------------------
     # Helper Methods
     # ---------------------------------------------------------
     def add_task_result(self, task: AgentTask, result: Dict[str, Any]):
         """Append a completed task to history"""
+        now = _utcnow_iso()
         self.tasks_history.append({
             "agent": task.agent,
             "action": task.action,
             "params": task.params,
             "output": result,
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": now
         })
-        self.updated_at = datetime.now(timezone.utc).isoformat()
+        self._output_json[len(self.tasks_history) - 1] = to_json(result).decode()
+        self.updated_at = now
+
+    def task_output_json(self, index: int) -> str:
+        """Compact JSON of a task's output, serialized once and reused on every later call"""
+        cached = self._output_json.get(index)
+        if cached is None:
+            cached = to_json(self.tasks_history[index].get("output")).decode()
+            self._output_json[index] = cached
+        return cached
 
     def set_plan(self, plan: InvestigationPlan):
         """Update the plan"""
         self.plan = plan
-        self.updated_at = datetime.now(timezone.utc).isoformat()
+        self.updated_at = _utcnow_iso()
 
     def set_verdict(self, verdict: ThreatVerdict):
         """Complete the investigation"""
         self.verdict = verdict
         self.status = "completed"
-        self.updated_at = datetime.now(timezone.utc).isoformat()
+        self.updated_at = _utcnow_iso()
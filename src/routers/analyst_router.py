@@ -3,16 +3,21 @@ API Router for Analyst Agent
 Exposes HTTP endpoints for log analysis
 """
 
+import asyncio
 import azure.functions as func
 import logging
-import json
+import orjson
 from pydantic import ValidationError
 from src.models.analyst_models import AnalystRequest
 from src.services.analyst_service import get_analyst_service
+from src.utils.http_utils import json_response
 
 # Create Blueprint
 analyst_bp = func.Blueprint()
 
+# 500 body, serialized once (error details are logged, never returned to clients)
+_INTERNAL_ERROR_BODY = orjson.dumps({"error": "Internal error"})
+
 @analyst_bp.route(route="analyze-logs", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
 async def handle_analyze_logs(req: func.HttpRequest) -> func.HttpResponse:
     """
@@ -21,45 +26,30 @@ async def handle_analyze_logs(req: func.HttpRequest) -> func.HttpResponse:
     Request body:
     {
         "query": "How many SQL injection attempts?",
-        "csv_path": "data/raw/firewall_logs.csv"  // optional
+        "csv_path": "data/raw/firewall_logs_0_50000.csv.gz"  // optional
     }
     """
     logging.info("Analyst endpoint called")
     
     try:
-        # Parse request
-        req_body = req.get_json()
-        analyst_request = AnalystRequest(**req_body)
+        # Parse and validate the raw body in one pass (no intermediate dict)
+        analyst_request = AnalystRequest.model_validate_json(req.get_body())
         
-        # Process via service layer
+        # Process via service layer (blocking: pandas + LLM calls), off the event loop
+        # so concurrent requests overlap instead of queueing behind each other
         service = get_analyst_service()
-        response = service.analyze(analyst_request)
+        response = await asyncio.to_thread(service.analyze, analyst_request)
         
         # Return JSON response
-        return func.HttpResponse(
-            body=response.model_dump_json(indent=2),
-            status_code=200,
-            mimetype="application/json"
-        )
+        return json_response(response)
         
     except ValidationError as e:
-        return func.HttpResponse(
-            json.dumps({"error": "Invalid input", "details": e.errors()}),
-            status_code=400,
-            mimetype="application/json"
-        )
+        # e.json() handles raw-bytes inputs
+        return json_response({"error": "Invalid input", "details": orjson.Fragment(e.json())}, 400)
     
     except FileNotFoundError as e:
-        return func.HttpResponse(
-            body=json.dumps({"error": str(e)}),
-            status_code=404,
-            mimetype="application/json"
-        )
+        return json_response({"error": str(e)}, 404)
     
-    except Exception as e:
-        logging.error(f"Analysis failed: {str(e)}")
-        return func.HttpResponse(
-            body=json.dumps({"error": f"Internal error: {str(e)}"}),
-            status_code=500,
-            mimetype="application/json"
-        )
+    except Exception:
+        logging.exception("Analysis failed")
+        return json_response(_INTERNAL_ERROR_BODY, 500)
@@ -1,14 +1,22 @@
 import azure.functions as func
 import logging
-import json
+import orjson
 from pydantic import ValidationError
 from src.models.manager_models import InvestigationRequest
 from src.services.investigation_service import get_investigation_service
 from src.services.cosmos_service import get_cosmos_service
+from src.utils.http_utils import json_response
 
 # Create a Blueprint (Group of routes)
 investigation_bp = func.Blueprint()
 
+# Upper bound on ids accepted by the batch status endpoint
+MAX_BATCH_IDS = 100
+
+# 500 bodies, serialized once (error details are logged, never returned to clients)
+_INTERNAL_ERROR_BODY = orjson.dumps({"error": "Internal Server Error"})
+_RETRIEVE_ERROR_BODY = orjson.dumps({"error": "Failed to retrieve investigation"})
+
 @investigation_bp.route(route="investigate", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
 async def investigate(req: func.HttpRequest) -> func.HttpResponse:
     """
@@ -18,69 +26,69 @@ async def investigate(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a request.')
 
     try:
-        # 1. Parse Input
-        req_body = req.get_json()
-        
-        # Validate with Pydantic
+        # 1. Parse and validate the raw body in one pass (no intermediate dict)
         # If 'priority' is missing, it defaults to 'medium' per the model
-        request_model = InvestigationRequest(**req_body)
+        request_model = InvestigationRequest.model_validate_json(req.get_body())
 
         # 2. Call Service
         service = get_investigation_service()
         state = await service.run_investigation(request_model)
 
         # 3. Return Result
-        # We use .model_dump_json() to automatically handle all nested objects
-        return func.HttpResponse(
-            state.model_dump_json(),
-            mimetype="application/json",
-            status_code=200
-        )
+        # Serialized straight from the model (handles all nested objects)
+        return json_response(state)
 
     except ValidationError as e:
-        return func.HttpResponse(
-            json.dumps({"error": "Invalid input", "details": e.errors()}),
-            status_code=400,
-            mimetype="application/json"
-        )
-    except Exception as e:
-        logging.error(f"Error: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({"error": "Internal Server Error", "details": str(e)}),
-            status_code=500,
-            mimetype="application/json"
-        )
+        return json_response({"error": "Invalid input", "details": orjson.Fragment(e.json())}, 400)
+    except Exception:
+        logging.exception("Investigation request failed")
+        return json_response(_INTERNAL_ERROR_BODY, 500)
 
 @investigation_bp.route(route="investigation/{id}", auth_level=func.AuthLevel.ANONYMOUS, methods=["GET"])
 async def get_investigation_status(req: func.HttpRequest) -> func.HttpResponse:
     """
-    GET /api/investigation/{id}
+    GET /api/investigation/{id}[?summary=true]
     Retrieves the current state of an investigation from Cosmos DB.
+    With summary=true only id, status, severity and timestamps are returned.
     """
     inv_id = req.route_params.get('id')
     
     try:
         # Direct DB Access (CQRS Pattern: Read side doesn't need domain logic)
         cosmos = get_cosmos_service()
-        state = cosmos.get_investigation(inv_id)
+        if req.params.get('summary', '').lower() == 'true':
+            state = await cosmos.get_investigation_summary(inv_id)
+        else:
+            state = await cosmos.get_investigation(inv_id)
         
         if not state:
-            return func.HttpResponse(
-                json.dumps({"error": "Investigation not found"}),
-                status_code=404,
-                mimetype="application/json"
-            )
+            return json_response({"error": "Investigation not found"}, 404)
 
-        return func.HttpResponse(
-            state.model_dump_json(),
-            mimetype="application/json",
-            status_code=200
-        )
+        return json_response(state)
         
-    except Exception as e:
-        logging.error(f"Error retrieving investigation: {str(e)}")
-        return func.HttpResponse(
-            json.dumps({"error": "Failed to retrieve investigation", "details": str(e)}),
-            status_code=500,
-            mimetype="application/json"
-        )
+    except Exception:
+        logging.exception("Error retrieving investigation %s", inv_id)
+        return json_response(_RETRIEVE_ERROR_BODY, 500)
+
+@investigation_bp.route(route="investigations", auth_level=func.AuthLevel.ANONYMOUS, methods=["GET"])
+async def get_investigations_status(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    GET /api/investigations?ids=a,b,c
+    Retrieves several investigations in one call (e.g. a dashboard polling in-flight work).
+    """
+    ids = [i.strip() for i in req.params.get('ids', '').split(',') if i.strip()]
+
+    if not ids:
+        return json_response({"error": "Query parameter 'ids' is required"}, 400)
+    if len(ids) > MAX_BATCH_IDS:
+        return json_response({"error": f"At most {MAX_BATCH_IDS} ids per request"}, 400)
+
+    try:
+        cosmos = get_cosmos_service()
+        states = await cosmos.get_investigations(ids)
+
+        return json_response({"investigations": states})
+
+    except Exception:
+        logging.exception("Error retrieving investigations")
+        return json_response(_RETRIEVE_ERROR_BODY, 500)
@@ -3,10 +3,19 @@ Analyst Service - Orchestrates the code interpreter workflow
 Coordinates between Agent, Executor, and Data Layer
 """
 
+import os
+import json
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from src.agents.analyst_agent import AnalystAgent
 from src.utils.code_executor import SecureCodeExecutor, CodeExecutionError
+from src.utils.singleton import singleton
 from src.models.analyst_models import (
     AnalystRequest, 
     AnalystResponse, 
@@ -27,9 +36,116 @@ class AnalystService:
 
     MAX_RETRIES = 1
 
+    # Narrow dtypes for the firewall log schema (roughly halves resident memory);
+    # low-cardinality string columns become categoricals so == filters compare int codes
+    CSV_DTYPES = {
+        "source_port": "int32",
+        "dest_port": "int32",
+        "http_status": "int16",
+        "protocol": "category",
+        "action": "category",
+        "alert_type": "category",
+    }
+
+    # Parquet schema metadata key holding the CSV_DTYPES a cached copy was written with
+    PARQUET_SCHEMA_KEY = b"analyst_csv_dtypes"
+
     def __init__(self):
         self.agent = AnalystAgent()
-        self.dataframe_cache = {}  # Cache loaded CSVs
+        # Cache loaded datasets: LRU bounded by total DataFrame memory
+        self.dataframe_cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self.cache_budget_bytes = int(os.getenv("ANALYST_DF_CACHE_MB", "256")) * 1024 * 1024
+        self._cache_sizes = {}
+        self._cache_bytes = 0
+        self._executors = {}  # One reusable executor per cached dataset
+        self._cache_lock = threading.Lock()  # Guards the cache structures
+        self._load_locks = {}  # Per-path locks: one parse per dataset, without blocking other datasets
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _parquet_path(path: Path) -> Path:
+        """Parquet sibling of a CSV dataset (logs.csv / logs.csv.gz -> logs.parquet)"""
+        name = path.name
+        for suffix in (".csv.gz", ".csv"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        return path.with_name(name + ".parquet")
+
+    def _read_dataset(self, path: Path) -> pd.DataFrame:
+        """
+        Read a dataset, preferring an up-to-date Parquet sibling over the CSV.
+
+        The first CSV parse writes the Parquet copy (dtypes, categoricals
+        included); later cold starts memory-map it instead of re-parsing.
+        The copy records the CSV_DTYPES it was written with, so changing the
+        schema invalidates it.
+        """
+        parquet_path = self._parquet_path(path)
+        schema_tag = json.dumps(self.CSV_DTYPES, sort_keys=True).encode()
+        if parquet_path.exists() and parquet_path.stat().st_mtime >= path.stat().st_mtime:
+            try:
+                metadata = pq.read_schema(parquet_path).metadata or {}
+                if metadata.get(self.PARQUET_SCHEMA_KEY) == schema_tag:
+                    table = pq.read_table(parquet_path, memory_map=True)
+                    return table.to_pandas(split_blocks=True, self_destruct=True)
+            except (OSError, pa.ArrowException) as e:
+                self.logger.warning("Ignoring unreadable Parquet cache %s: %s", parquet_path, e)
+
+        df = pd.read_csv(path, dtype=self.CSV_DTYPES)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), self.PARQUET_SCHEMA_KEY: schema_tag})
+        tmp_path = None
+        try:
+            # Write beside the target and rename into place, so concurrent loaders
+            # (other worker processes) never see a partially written file
+            fd, tmp_path = tempfile.mkstemp(dir=parquet_path.parent, prefix=parquet_path.name, suffix=".tmp")
+            os.close(fd)
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, parquet_path)
+        except OSError as e:
+            # e.g. a read-only deployment; the CSV still works, just slower on cold start
+            self.logger.warning("Could not write Parquet cache %s: %s", parquet_path, e)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return df
+
+    def _cache_get(self, csv_path: str):
+        """Cached DataFrame for a path (marked most recently used), or None"""
+        with self._cache_lock:
+            df = self.dataframe_cache.get(csv_path)
+            if df is not None:
+                self.dataframe_cache.move_to_end(csv_path)
+            return df
+
+    def _cache_put(self, csv_path: str, df: pd.DataFrame):
+        """Cache a DataFrame, evicting least recently used ones beyond the memory budget"""
+        size = int(df.memory_usage(deep=True).sum())
+        with self._cache_lock:
+            self.dataframe_cache[csv_path] = df
+            self._cache_sizes[csv_path] = size
+            self._cache_bytes += size
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._cache_bytes > self.cache_budget_bytes and len(self.dataframe_cache) > 1:
+                evicted, _ = self.dataframe_cache.popitem(last=False)
+                self._cache_bytes -= self._cache_sizes.pop(evicted)
+                self._executors.pop(evicted, None)
+                self.logger.info("Evicted dataset from cache: %s", evicted)
+
+    def get_executor(self, csv_path: str) -> SecureCodeExecutor:
+        """
+        Executor bound to a dataset, reused across requests.
+
+        Executors are stateless apart from their DataFrame (each run gets a
+        fresh namespace), so concurrent analyses can share one safely.
+        """
+        df = self.load_dataset(csv_path)
+        with self._cache_lock:
+            executor = self._executors.get(csv_path)
+            if executor is None or executor.df is not df:
+                executor = SecureCodeExecutor(df)
+                self._executors[csv_path] = executor
+            return executor
 
     def load_dataset(self, csv_path: str) -> pd.DataFrame:
         """
@@ -41,15 +157,31 @@ class AnalystService:
         Returns:
             Pandas DataFrame
         """
-        if csv_path in self.dataframe_cache:
-            return self.dataframe_cache[csv_path]
+        df = self._cache_get(csv_path)
+        if df is not None:
+            return df
         
-        path = Path(csv_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Dataset not found: {csv_path}")
-        
-        df = pd.read_csv(csv_path)
-        self.dataframe_cache[csv_path] = df
+        with self._cache_lock:
+            load_lock = self._load_locks.setdefault(csv_path, threading.Lock())
+
+        try:
+            with load_lock:
+                # Another request may have loaded it while we waited
+                df = self._cache_get(csv_path)
+                if df is not None:
+                    return df
+
+                path = Path(csv_path)
+                if not path.exists():
+                    raise FileNotFoundError(f"Dataset not found: {csv_path}")
+                
+                df = self._read_dataset(path)
+                self._cache_put(csv_path, df)
+        finally:
+            # Later requests hit the cache; waiters already hold the lock object
+            with self._cache_lock:
+                if self._load_locks.get(csv_path) is load_lock:
+                    del self._load_locks[csv_path]
 
         return df
     
@@ -63,14 +195,14 @@ class AnalystService:
         Returns:
             AnalystResponse with code, results, and natural language answer
         """
-        # Step 1: Load dataset
-        df = self.load_dataset(request.csv_path)
+        # Step 1: Load dataset (and its executor)
+        executor = self.get_executor(request.csv_path)
+        df = executor.df
 
         # Step 2: Generate initial code
         generated_code = self.agent.generate_code(request.query)
         
         # Step 3: Execute code
-        executor = SecureCodeExecutor(df)
         exec_result = executor.execute(generated_code)
 
         # Step 4: Self-correction loop (if execution failed)
@@ -114,12 +246,9 @@ class AnalystService:
         )
 
 
-# Singleton instance
-_service_instance = None
-
+# Singleton instance (one per worker process)
+@singleton
 def get_analyst_service() -> AnalystService:
     """Get or create AnalystService singleton"""
-    global _service_instance
-    if _service_instance is None:
-        _service_instance = AnalystService()
-    return _service_instance
+    return AnalystService()
+
@@ -5,10 +5,59 @@ Handles all Read/Write operations to Azure Cosmos DB.
 """
 
 import os
+import asyncio
 import logging
-from typing import Optional, List
-from azure.cosmos import CosmosClient, PartitionKey
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Any, Iterable, Type, TypeVar, Union, get_args, get_origin
+from azure.cosmos import PartitionKey
+from azure.cosmos.aio import CosmosClient
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
 from src.models.state_models import InvestigationState
+from src.utils.singleton import singleton
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Bound once: every write serializes through this directly
+_STATE_SER = InvestigationState.__pydantic_serializer__
+
+# Cosmos accepts at most this many operations per patch request
+_MAX_PATCH_OPS = 10
+
+
+def _construct_value(annotation: Any, value: Any) -> Any:
+    """Rebuild nested models inside a stored value according to its field annotation"""
+    if value is None:
+        return None
+    origin = get_origin(annotation)
+    if origin is Union:
+        # Optional[Model]: use the first model type in the union
+        for arg in get_args(annotation):
+            if isinstance(arg, type) and issubclass(arg, BaseModel):
+                return _construct_recursive(arg, value) if isinstance(value, dict) else value
+        return value
+    if origin is list and isinstance(value, list):
+        (item_type,) = get_args(annotation) or (Any,)
+        return [_construct_value(item_type, item) for item in value]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        return _construct_recursive(annotation, value)
+    return value
+
+
+def _construct_recursive(cls: Type[ModelT], data: dict) -> ModelT:
+    """
+    Build a model (and its nested models) from trusted data without validation.
+
+    Documents we wrote ourselves don't need re-validating on the way back;
+    model_construct skips it, and unknown keys (Cosmos system fields like
+    _rid/_etag/_ts) are dropped.
+    """
+    fields = {}
+    for name, field in cls.model_fields.items():
+        if name in data:
+            fields[name] = _construct_value(field.annotation, data[name])
+    return cls.model_construct(**fields)
 
 class CosmosService:
     def __init__(self):
@@ -23,12 +72,27 @@ class CosmosService:
         if not self.url or not self.key:
             raise ValueError("Missing COSMOS_ENDPOINT or COSMOS_KEY in environment variables")
         
-        # Initialize the Azure Client
-        self.client = CosmosClient(self.url, credential=self.key)
+        # Initialize the Azure Client (async, so DB round trips don't block the event loop).
+        # One client per worker: its pooled connections are reused by every request.
+        # Single-region accounts can skip endpoint discovery (no extra metadata round trips).
+        self.client = CosmosClient(
+            self.url,
+            credential=self.key,
+            retry_total=3,
+            enable_endpoint_discovery=os.getenv("COSMOS_ENABLE_ENDPOINT_DISCOVERY", "true").lower() == "true"
+        )
         self.database = self.client.get_database_client(self.db_name)
         self.container = self.database.get_container_client(self.container_name)
 
-    def create_investigation(self, alert_text: str) -> InvestigationState:
+    async def warm_up(self):
+        """
+        Open a connection and fetch account metadata ahead of the first real request,
+        so that request doesn't pay for the TLS handshake and endpoint discovery.
+        """
+        await self.container.read()
+        self.logger.info("Cosmos connection warmed up")
+
+    async def create_investigation(self, alert_text: str) -> InvestigationState:
         """
         Start a new investigation document.
         Equivalent to: INSERT INTO c VALUES (...)
@@ -37,55 +101,143 @@ class CosmosService:
         state = InvestigationState(alert_text=alert_text)
 
         # Save to DB (convert to JSON dict first)
-        self.container.create_item(body=state.model_dump(mode="json"))
+        await self.container.create_item(body=_STATE_SER.to_python(state, mode="json"))
 
-        self.logger.info(f"Created new investigation: {state.id}")
+        self.logger.info("Created new investigation: %s", state.id)
         return state
         
-    def get_investigation(self, investigation_id: str) -> Optional[InvestigationState]:
+    async def get_investigation(self, investigation_id: str) -> Optional[InvestigationState]:
         """
         Retrieve state by ID.
         Equivalent to: SELECT * FROM c WHERE c.id = '...'
         """
         try:
             # We must provide the partition key (id) for fast lookup
-            item = self.container.read_item(
+            item = await self.container.read_item(
                 item=investigation_id,
                 partition_key=investigation_id
             )
             # Convert JSON back to Pydantic object
-            return InvestigationState(**item)
+            return _construct_recursive(InvestigationState, item)
         except Exception as e:
-            self.logger.warning(f"Investigation {investigation_id} not found: {str(e)}")
+            self.logger.warning("Investigation %s not found: %s", investigation_id, e)
             return None
         
-    def update_investigation(self, state: InvestigationState) -> InvestigationState:
+    async def get_investigation_summary(self, investigation_id: str) -> Optional[dict]:
+        """
+        Retrieve just the status fields of an investigation.
+        Equivalent to: SELECT c.id, c.status, ... FROM c WHERE c.id = '...'
+
+        The projection runs server-side, so only a few small fields cross the
+        wire and get parsed, instead of the full document with its task history.
+        """
+        query = (
+            "SELECT c.id, c.status, c.verdict.severity AS severity, c.created_at, c.updated_at "
+            "FROM c WHERE c.id = @id"
+        )
+        items = self.container.query_items(
+            query=query,
+            parameters=[{"name": "@id", "value": investigation_id}],
+            partition_key=investigation_id
+        )
+        async for item in items:
+            return item
+        return None
+
+    async def get_investigations(self, investigation_ids: List[str]) -> List[InvestigationState]:
+        """
+        Retrieve several investigations at once.
+
+        The point reads run concurrently over the shared connection pool, so N
+        lookups cost about one round trip. Missing IDs are skipped.
+
+        Args:
+            investigation_ids: IDs to fetch (duplicates are read once)
+
+        Returns:
+            Found investigations, in request order
+        """
+        ids = list(dict.fromkeys(investigation_ids))
+        items = await asyncio.gather(
+            *(self.container.read_item(item=i, partition_key=i) for i in ids),
+            return_exceptions=True
+        )
+
+        states = []
+        for investigation_id, item in zip(ids, items):
+            if isinstance(item, CosmosResourceNotFoundError):
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            states.append(_construct_recursive(InvestigationState, item))
+        return states
+
+    async def update_investigation(self, state: InvestigationState) -> InvestigationState:
         """
         Save changes to an existing investigation.
         Equivalent to: UPDATE c SET ... WHERE c.id = ...
         """
         # upsert_item = "Update if exists, Insert if new"
-        self.container.upsert_item(body=state.model_dump(mode="json"))
-        self.logger.info(f"Updated investigation: {state.id}")
+        await self.container.upsert_item(body=_STATE_SER.to_python(state, mode="json"))
+        self.logger.info("Updated investigation: %s", state.id)
         return state
     
-    def list_recent_investigations(self, limit: int = 10) -> List[InvestigationState]:
+    async def patch_investigation(
+        self,
+        state: InvestigationState,
+        new_entries: List[dict],
+        fields: Iterable[str] = ()
+    ):
+        """
+        Write only what changed, without rewriting the document.
+        Equivalent to: UPDATE c SET c.tasks_history = ARRAY_CONCAT(c.tasks_history, [...]), c.<field> = ...
+
+        New tasks_history entries are JSON-patch "add"s to /tasks_history/-,
+        and changed top-level fields (plus updated_at) are "set"s. The stored
+        history is never re-sent, so a save costs the same at task 50 as at task 1.
+
+        Args:
+            state: Investigation being saved
+            new_entries: tasks_history entries not yet stored
+            fields: Other top-level fields that changed (e.g. "plan", "verdict", "status")
+        """
+        # Entries may still hold agent response models; convert them in one pydantic-core pass
+        values = to_jsonable_python(new_entries)
+        operations = [{"op": "add", "path": "/tasks_history/-", "value": value} for value in values]
+        changed = _STATE_SER.to_python(state, mode="json", include={*fields, "updated_at"})
+        operations.extend({"op": "set", "path": f"/{name}", "value": value} for name, value in changed.items())
+
+        # Chunks are sent in order so appended entries keep their sequence
+        for start in range(0, len(operations), _MAX_PATCH_OPS):
+            await self.container.patch_item(
+                item=state.id,
+                partition_key=state.id,
+                patch_operations=operations[start:start + _MAX_PATCH_OPS]
+            )
+        self.logger.info("Patched investigation %s: %d new task results", state.id, len(new_entries))
+
+    async def list_recent_investigations(self, limit: int = 10, days: Optional[int] = None) -> List[InvestigationState]:
         """
         Get the last N investigations.
         Uses a SQL query.
+
+        Pass `days` to only consider investigations created in that window:
+        the created_at lower bound is a range filter served by the index, so
+        each partition reads only its recent documents instead of sorting all
+        of them. Without it, results may reach back arbitrarily far.
         """
-        query = f"SELECT * FROM c ORDER BY c.created_at DESC OFFSET 0 LIMIT {limit}"
-        items = self.container.query_items(
-            query=query,
-            enable_cross_partition_query=True
-        )
-        return [InvestigationState(**item) for item in items]
+        query = "SELECT TOP @limit * FROM c"
+        parameters = [{"name": "@limit", "value": limit}]
+        if days is not None:
+            query += " WHERE c.created_at >= @since"
+            since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+            parameters.append({"name": "@since", "value": since})
+        query += " ORDER BY c.created_at DESC"
+        # Cross-partition queries are the default on the async client
+        items = self.container.query_items(query=query, parameters=parameters)
+        return [_construct_recursive(InvestigationState, item) async for item in items]
     
 # Singleton Instance
-_cosmos_instance = None
-
+@singleton
 def get_cosmos_service() -> CosmosService:
-    global _cosmos_instance
-    if _cosmos_instance is None:
-        _cosmos_instance = CosmosService()
-    return _cosmos_instance
\ No newline at end of file
+    return CosmosService()
@@ -3,9 +3,10 @@ Investigation Service - The Workflow Coordinator
 Connects the Manager, Intel, and Analyst components with ReAct loop
 """
 
+import asyncio
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from src.agents.manager_agent import ManagerAgent
 from src.agents.intel_agent import IntelAgent
@@ -15,6 +16,82 @@ from src.services.cosmos_service import get_cosmos_service
 from src.models.manager_models import InvestigationRequest, AgentTask
 from src.models.analyst_models import AnalystRequest
 from src.models.state_models import InvestigationState
+from src.utils.singleton import singleton
+from src.utils.http_utils import new_http_client
+
+class _StateWriter:
+    """
+    Write-behind persistence for one investigation's state.
+
+    save() only marks the state dirty and makes sure a background flush is
+    running, so Cosmos round trips overlap with the next LLM/agent call.
+    Saves within the debounce window are coalesced into one write, and the
+    state is serialized at flush time (always the latest version). Once
+    flush() is awaited the debounce is skipped: pending and later saves are
+    written immediately.
+
+    Writes are patches: the tasks_history entries added since the last write,
+    plus the top-level fields named in save() calls. The growing history is
+    never re-sent; a full upsert only happens to recover from a failed write.
+    """
+
+    def __init__(self, cosmos_service, state: InvestigationState, debounce_seconds: float):
+        self.cosmos_service = cosmos_service
+        self.state = state
+        self.debounce_seconds = debounce_seconds
+        self.logger = logging.getLogger(__name__)
+        self._dirty = False
+        self._full = False
+        self._fields = set()
+        self._persisted = len(state.tasks_history)  # Entries already stored in Cosmos
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+        self._flush_now = asyncio.Event()  # Set by flush(): stop debouncing
+
+    def save(self, *fields: str):
+        """Schedule a write of new task results and the named top-level fields"""
+        self._dirty = True
+        self._fields.update(fields)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._dirty:
+            if not self._flush_now.is_set():
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), self.debounce_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            self._dirty = False
+            full, self._full = self._full, False
+            fields, self._fields = self._fields, set()
+            count = len(self.state.tasks_history)
+            try:
+                if full:
+                    await self.cosmos_service.update_investigation(self.state)
+                elif count > self._persisted or fields:
+                    await self.cosmos_service.patch_investigation(
+                        self.state,
+                        self.state.tasks_history[self._persisted:count],
+                        fields
+                    )
+                self._persisted = count
+                self._error = None  # Earlier failures are superseded by this write
+            except Exception as e:
+                self.logger.error("Saving investigation %s failed: %s", self.state.id, e)
+                self._error = e
+                # A patch may have been partially applied; the next write replaces the whole document
+                self._full = True
+
+    async def flush(self):
+        """Write pending changes now and wait; raises if the most recent write failed"""
+        self._flush_now.set()
+        if self._task is not None:
+            await self._task
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
 
 class InvestigationService:
     """
@@ -24,7 +101,11 @@ class InvestigationService:
 
     def __init__(self):
         self.manager_agent = ManagerAgent()
-        self.intel_agent = IntelAgent()
+
+        # Process-wide HTTP/2 keep-alive pool for outbound threat-intel calls; it lives
+        # as long as the worker (the Functions host gives Python no shutdown hook)
+        self._http = new_http_client()
+        self.intel_agent = IntelAgent(http_client=self._http)
         self.analyst_service = get_analyst_service()
         self.cosmos_service = get_cosmos_service()
         self.logger = logging.getLogger(__name__)
@@ -32,6 +113,9 @@ class InvestigationService:
         # Safety: Maximum iterations before forcing a stop
         self.max_loops = int(os.getenv("MAX_INVESTIGATION_LOOPS", "10"))
 
+        # Window in which consecutive state saves collapse into one Cosmos write
+        self.write_debounce_seconds = int(os.getenv("COSMOS_WRITE_DEBOUNCE_MS", "50")) / 1000
+
     async def run_investigation(self, request: InvestigationRequest) -> InvestigationState:
         """
         Main entry point.
@@ -41,8 +125,9 @@ class InvestigationService:
         3. Final Verdict
         """
         # 1. CREATE STATE
-        state = self.cosmos_service.create_investigation(request.alert)
-        self.logger.info(f"Started Investigation ID: {state.id}")
+        state = await self.cosmos_service.create_investigation(request.alert)
+        self.logger.info("Started Investigation ID: %s", state.id)
+        writer = _StateWriter(self.cosmos_service, state, self.write_debounce_seconds)
 
         try:
             # 2. THE REACT LOOP
@@ -50,27 +135,27 @@ class InvestigationService:
             
             while loop_count < self.max_loops:
                 loop_count += 1
-                self.logger.info(f"--- ReAct Loop Iteration {loop_count}/{self.max_loops} ---")
+                self.logger.info("--- ReAct Loop Iteration %d/%d ---", loop_count, self.max_loops)
                 
                 # Ask Manager: "What should we do next?"
                 decision = await self.manager_agent.plan_next_step(state)
                 
-                self.logger.info(f"Manager says: {decision.decision} - {decision.reasoning}")
+                self.logger.info("Manager says: %s - %s", decision.decision, decision.reasoning)
                 
                 # STOP CONDITION
                 if decision.decision == "stop" or not decision.tasks:
                     self.logger.info("Manager decided to stop. Moving to verdict.")
                     break
                 
-                # EXECUTE THE NEW TASKS
-                for task in decision.tasks:
-                    result = await self._execute_task(task)
-                    
-                    # Update state and save to DB after every task
+                # EXECUTE THE NEW TASKS (concurrently; results come back in task order)
+                results = await self.manager_agent.execute_plan(decision.tasks, self._execute_task)
+                for task, result in zip(decision.tasks, results):
                     state.add_task_result(task, result)
-                    self.cosmos_service.update_investigation(state)
                 
-                self.logger.info(f"Completed {len(decision.tasks)} tasks. Saved to DB.")
+                # One save per batch rather than one per task, written in the background (new entries only)
+                writer.save()
+                
+                self.logger.info("Completed %d tasks. Save scheduled.", len(decision.tasks))
             
             # Check if we hit the loop limit
             if loop_count >= self.max_loops:
@@ -79,31 +164,35 @@ class InvestigationService:
             # 3. FINAL SYNTHESIS
             self.logger.info("Phase: Final Synthesis")
             
-            task_results = state.tasks_history
-            verdict = await self.manager_agent.synthesize_verdict(
-                request.alert,
-                task_results
-            )
+            verdict = await self.manager_agent.synthesize_verdict(state)
             
-            # Final Save
+            # Final Save (wait for it: the result must be persisted before we return)
             state.set_verdict(verdict)
-            self.cosmos_service.update_investigation(state)
+            writer.save("verdict", "status")
+            await writer.flush()
             
-            self.logger.info(f"Investigation complete. Verdict: {verdict.severity}")
+            self.logger.info("Investigation complete. Verdict: %s", verdict.severity)
             return state
 
         except Exception as e:
-            self.logger.error(f"Investigation failed: {str(e)}")
+            self.logger.error("Investigation failed: %s", e)
             state.status = "failed"
             state.tasks_history.append({"error": str(e)})
-            self.cosmos_service.update_investigation(state)
-            raise e
+            writer.save("status")
+            try:
+                await writer.flush()
+            except Exception as save_error:
+                self.logger.error("Could not save failed investigation %s: %s", state.id, save_error)
+            raise
 
     async def _execute_task(self, task: AgentTask) -> Dict[str, Any]:
         """
         Helper to route a task to the correct agent.
+
+        Agent responses are kept as models in "output"; they are serialized
+        only once, along with the state, when it is written or returned.
         """
-        self.logger.info(f"Executing task: {task.agent} -> {task.action}")
+        self.logger.info("Executing task: %s -> %s", task.agent, task.action)
         
         try:
             output = None
@@ -112,18 +201,23 @@ class InvestigationService:
                 if task.action == 'lookup_ip':
                     ip = task.params.get('ip_address')
                     if ip:
-                        response = await self.intel_agent.lookup_ip(ip)
-                        output = response.model_dump(mode='json')
+                        output = await self.intel_agent.lookup_ip(ip)
                     else:
                         output = {"error": "Missing 'ip_address' parameter"}
+                elif task.action == 'lookup_ips':
+                    ips = task.params.get('ip_addresses')
+                    if ips:
+                        output = await self.intel_agent.lookup_ips(ips)
+                    else:
+                        output = {"error": "Missing 'ip_addresses' parameter"}
 
             elif task.agent == 'analyst':
                 if task.action == 'analyze_logs':
                     query = task.params.get("query")
                     if query:
                         analyst_req = AnalystRequest(query=query)
-                        response = self.analyst_service.analyze(analyst_req)
-                        output = response.model_dump(mode='json')
+                        # analyze() is blocking (LLM calls + code execution), keep it off the event loop
+                        output = await asyncio.to_thread(self.analyst_service.analyze, analyst_req)
                     else:
                         output = {"error": "Missing 'query' parameter"}
             else:
@@ -137,7 +231,7 @@ class InvestigationService:
             }
 
         except Exception as e:
-            self.logger.error(f"Task failed: {str(e)}")
+            self.logger.error("Task failed: %s", e)
             return {
                 "agent": task.agent,
                 "action": task.action,
@@ -146,10 +240,7 @@ class InvestigationService:
             }
 
 # Singleton Pattern
-_service_instance = None
-
+@singleton
 def get_investigation_service() -> InvestigationService:
-    global _service_instance
-    if _service_instance is None:
-        _service_instance = InvestigationService()
-    return _service_instance
+    return InvestigationService()
+
@@ -4,11 +4,121 @@ Implements sandboxed execution with security restrictions
 """
 
 import re
+import ast
+import sys
 import time
+import ctypes
+import signal
+import builtins
+import logging
+import threading
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from types import CodeType, FunctionType, MappingProxyType
+from typing import Dict, Any, Optional, Sequence, Tuple
 from io import StringIO
-import sys
+from contextlib import contextmanager
+
+try:
+    # Optional: SIMD multi-pattern matcher; validation falls back to the compiled regex without it
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+# Copy-on-write (default from pandas 3.0): frames that share data copy a column only
+# when one of them writes to it, so per-run views of the dataset cost O(columns)
+pd.set_option('mode.copy_on_write', True)
+
+# Guards the one-time swap of sys.stdout for the per-thread capture proxy
+_STDOUT_INSTALL_LOCK = threading.Lock()
+
+# Hyperscan scratch space can't be shared by concurrent scans: one per thread
+_HS_LOCAL = threading.local()
+
+# Distinct snippets remembered by the process-wide validation/compile cache
+CODE_CACHE_SIZE = 512
+
+# How often a timed-out snippet is interrupted again if it keeps running
+TIMEOUT_REPEAT_SECONDS = 0.1
+
+
+def _safe_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """__import__ replacement: only the modules the sandbox allows"""
+    if level != 0 or name.partition('.')[0] not in SecureCodeExecutor.ALLOWED_IMPORTS:
+        raise ImportError(f"Import of '{name}' is not allowed")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+def _elapsed_ms(start_ns: int) -> float:
+    """Milliseconds since a perf_counter_ns() reading (monotonic), to 0.01 ms"""
+    return round((time.perf_counter_ns() - start_ns) / 1_000_000, 2)
+
+
+# Parameters of the function every snippet is compiled into (see _compile_snippet)
+SNIPPET_ARGS = ('df', 'pd', 'pandas', 'np', 'numpy', 'cols', 'dtypes')
+
+_SNIPPET_DEF = f"def _snippet({', '.join(SNIPPET_ARGS)}):\n    pass"
+_RETURN_RESULT = "try:\n    return result\nexcept NameError:\n    return None"
+
+
+def _compile_snippet(src: str) -> CodeType:
+    """
+    Parse, check and compile a snippet into the body of a function
+
+    The tree that passes the AST security check is the one compiled, so the
+    source is parsed a single time. The snippet becomes
+
+        def _snippet(df, pd, pandas, np, numpy, cols, dtypes):
+            <snippet>
+            return result       # or: return <expression>, for a single expression
+
+    so df/pd/np (and the column metadata) are fast locals instead of dict lookups on every reference,
+    and the return value is the result.
+
+    Returns:
+        Code object of the function (bind it with FunctionType(code, globals))
+
+    Raises:
+        CodeExecutionError: If the code uses a forbidden construct
+        SyntaxError: If the code doesn't parse
+    """
+    tree = ast.parse(src, '<sandbox>')
+    _SecurityVisitor().visit(tree)
+
+    if len(tree.body) == 1 and isinstance(tree.body[0], ast.Expr):
+        body = [ast.Return(value=tree.body[0].value)]
+    else:
+        body = tree.body + ast.parse(_RETURN_RESULT).body
+
+    module = ast.parse(_SNIPPET_DEF)
+    module.body[0].body = body
+    ast.fix_missing_locations(module)
+    module_code = compile(module, '<sandbox>', 'exec')
+    return next(const for const in module_code.co_consts if isinstance(const, CodeType))
+
+
+def _build_hyperscan_db(patterns: Sequence[str]):
+    """
+    Compile all patterns into one Hyperscan block-mode database
+
+    Returns:
+        The database, or None if Hyperscan is unavailable or rejects a pattern
+    """
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=list(range(len(patterns))),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns)
+        )
+        return db
+    except hyperscan.error as e:
+        logging.getLogger(__name__).warning("Hyperscan unavailable, using regex validation: %s", e)
+        return None
 
 
 class CodeExecutionError(Exception):
@@ -16,6 +126,191 @@ class CodeExecutionError(Exception):
     pass
 
 
+class ExecutionTimeoutError(CodeExecutionError):
+    """Raised when sandboxed code runs past its time limit"""
+    pass
+
+
+class _SnippetTimeout(BaseException):
+    """
+    Injected into a snippet that runs too long
+
+    A BaseException so that the `except Exception` blocks generated code is
+    full of can't swallow it; _time_limit turns it into ExecutionTimeoutError.
+    """
+    pass
+
+
+class _SecurityVisitor(ast.NodeVisitor):
+    """
+    Reject forbidden constructs by syntax rather than by text
+
+    Unlike the pattern scan, this sees through formatting and aliasing
+    (f = eval; f(...)) and never trips on comments or string contents.
+
+    Snippets run as a function body, so top-level return/yield/await (which
+    would silently change its meaning) are rejected as they were before.
+    """
+
+    def __init__(self):
+        self._scope_depth = 0
+
+    def _visit_scope(self, node: ast.AST):
+        self._scope_depth += 1
+        self.generic_visit(node)
+        self._scope_depth -= 1
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = visit_ClassDef = _visit_scope
+
+    def _top_level_only_in_function(self, node: ast.AST):
+        if self._scope_depth == 0:
+            raise SyntaxError(f"'{type(node).__name__.lower()}' outside function")
+        self.generic_visit(node)
+
+    visit_Return = visit_Yield = visit_YieldFrom = visit_Await = _top_level_only_in_function
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._check_module(alias.name)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.level:
+            raise CodeExecutionError("Relative imports are not allowed")
+        self._check_module(node.module or '')
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        if node.id in SecureCodeExecutor.FORBIDDEN_NAMES or _is_dunder(node.id):
+            raise CodeExecutionError(f"Use of '{node.id}' is not allowed")
+
+    def visit_Attribute(self, node: ast.Attribute):
+        if _is_dunder(node.attr):
+            raise CodeExecutionError(f"Access to attribute '{node.attr}' is not allowed")
+        self.generic_visit(node)
+
+    @staticmethod
+    def _check_module(name: str):
+        if name.partition('.')[0] not in SecureCodeExecutor.ALLOWED_IMPORTS:
+            raise CodeExecutionError(f"Import of '{name}' is not allowed")
+
+
+def _is_dunder(name: str) -> bool:
+    return len(name) > 4 and name.startswith('__') and name.endswith('__')
+
+
+class _ThreadLocalStdout:
+    """
+    sys.stdout stand-in that sends each thread's writes to its own capture buffer
+
+    Threads that aren't capturing write through to the stream it replaced, so
+    concurrent executions capture their output without a process-wide lock.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self._local, 'buffer', None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    @contextmanager
+    def capture(self, buffer: StringIO):
+        self._local.buffer = buffer
+        try:
+            yield
+        finally:
+            self._local.buffer = None
+
+
+def _capture_stdout(buffer: StringIO):
+    """Send the calling thread's stdout to buffer for the duration of the block"""
+    with _STDOUT_INSTALL_LOCK:
+        if not isinstance(sys.stdout, _ThreadLocalStdout):
+            sys.stdout = _ThreadLocalStdout(sys.stdout)
+        proxy = sys.stdout
+    return proxy.capture(buffer)
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    """
+    Raise ExecutionTimeoutError in the calling thread if the block runs too long
+
+    The main thread uses a SIGALRM interval timer. Worker threads (where
+    analyses normally run) can't receive signals, so a timer thread injects
+    the exception into them asynchronously instead. Either way the exception
+    lands between bytecodes: a single long-running C call (e.g. a huge merge)
+    is interrupted as soon as it returns to Python.
+
+    Once the limit passes, the interrupt is repeated every TIMEOUT_REPEAT_SECONDS
+    until the block exits, and the block fails even if the code swallowed it
+    (a bare `except:`) and finished normally.
+    """
+    fired = False
+
+    if threading.current_thread() is threading.main_thread() and hasattr(signal, 'setitimer'):
+        def on_alarm(signum, frame):
+            nonlocal fired
+            fired = True
+            raise _SnippetTimeout()
+
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, seconds, TIMEOUT_REPEAT_SECONDS)
+        try:
+            yield
+        except _SnippetTimeout:
+            pass
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        if fired:
+            raise ExecutionTimeoutError()
+        return
+
+    thread_id = threading.get_ident()
+    guard = threading.Lock()
+    done = threading.Event()
+
+    def expire():
+        nonlocal fired
+        wait = seconds
+        while not done.wait(wait):
+            with guard:
+                if done.is_set():
+                    return
+                fired = True
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    ctypes.c_ulong(thread_id), ctypes.py_object(_SnippetTimeout)
+                )
+            wait = TIMEOUT_REPEAT_SECONDS
+
+    timer = threading.Thread(target=expire, daemon=True)
+    timer.start()
+    try:
+        yield
+    except _SnippetTimeout:
+        pass
+    finally:
+        with guard:
+            done.set()
+            if fired:
+                # Drop an interrupt that was injected but not yet delivered
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+    if fired:
+        raise ExecutionTimeoutError()
+
+
 class SecureCodeExecutor:
     """
     Executes AI-generated Python code in a restricted environment
@@ -25,11 +320,18 @@ class SecureCodeExecutor:
     2. Blacklist dangerous patterns (os, subprocess, eval, exec)
     3. Timeout enforcement (5 seconds max)
     4. No file system access (DataFrame passed in-memory)
+    5. Restricted builtins (imports limited to ALLOWED_IMPORTS)
     """
     
-    ALLOWED_IMPORTS = {'pandas', 'pd', 'numpy', 'np', 'datetime'}
+    ALLOWED_IMPORTS = frozenset({'pandas', 'pd', 'numpy', 'np', 'datetime'})
+
+    # Builtins that may not even be referenced (checked on the AST, so aliasing is caught too)
+    FORBIDDEN_NAMES = frozenset({
+        'eval', 'exec', 'compile', 'open', 'globals', 'locals', 'vars',
+        'getattr', 'setattr', 'delattr', 'breakpoint', 'input',
+    })
     
-    FORBIDDEN_PATTERNS = [
+    FORBIDDEN_PATTERNS = (
         r'\bos\.',
         r'\bsubprocess\.',
         r'\beval\s*\(',
@@ -42,50 +344,202 @@ class SecureCodeExecutor:
         r'\bdelattr\s*\(',
         r'\bsetattr\s*\(',
         r'\b__\w+__',  # Dunder methods (except common ones)
-    ]
+    )
+
+    # Suspicious imports, by the name reported when one is found
+    FORBIDDEN_IMPORTS = {
+        'import os': r'\bimport\s+os\b',
+        'import sys': r'\bimport\s+sys\b',
+        'import subprocess': r'\bimport\s+subprocess\b',
+        'from os': r'\bfrom\s+os\b',
+    }
+
+    # Every rule in one list: ids below len(FORBIDDEN_PATTERNS) are patterns, the rest imports
+    _RULES = FORBIDDEN_PATTERNS + tuple(FORBIDDEN_IMPORTS.values())
+    _IMPORT_NAMES = tuple(FORBIDDEN_IMPORTS)
+
+    # All rules in one alternation, compiled once: a single scan per validation.
+    # Group g<i> identifies which rule matched.
+    _FORBIDDEN_RE = re.compile(
+        '|'.join(f'(?P<g{i}>{p})' for i, p in enumerate(_RULES)),
+        re.IGNORECASE
+    )
+
+    # Same rules as one Hyperscan database (None when Hyperscan isn't installed)
+    _HS_DB = _build_hyperscan_db(_RULES)
     
     TIMEOUT_SECONDS = 5
+
+    # Bounds on rendered output: large result frames are abbreviated, and the text is capped
+    DISPLAY_MAX_ROWS = 100
+    DISPLAY_MAX_COLUMNS = 20
+    DISPLAY_WIDTH = 200
+    MAX_OUTPUT_CHARS = 65536
+
+    # The only builtins generated code can reach (no open, getattr, type, ...)
+    SAFE_BUILTINS = {
+        name: getattr(builtins, name) for name in (
+            'abs', 'all', 'any', 'bool', 'dict', 'enumerate', 'filter', 'float',
+            'int', 'isinstance', 'len', 'list', 'map', 'max', 'min', 'print',
+            'range', 'reversed', 'round', 'set', 'sorted', 'str', 'sum', 'tuple', 'zip',
+            'Exception', 'KeyError', 'IndexError', 'NameError', 'TypeError', 'ValueError', 'ZeroDivisionError',
+        )
+    }
+    SAFE_BUILTINS['__import__'] = _safe_import
+
+    # Names every execution starts with, built once at import (copied per run).
+    # numpy is always loaded anyway (pandas depends on it), so it is always exposed.
+    BASE_NAMESPACE = {
+        'pd': pd,
+        'pandas': pd,
+        'np': np,
+        'numpy': np,
+        '__builtins__': SAFE_BUILTINS,
+    }
     
     def __init__(self, dataframe: pd.DataFrame):
         """
         Initialize executor with the dataset
         
         Args:
-            dataframe: Pandas DataFrame containing firewall logs
+            dataframe: Pandas DataFrame containing firewall logs (not modified)
         """
         self.df = dataframe
-    
+
+        # Column metadata, computed once and handed to every snippet (read-only)
+        self.cols = tuple(self.df.columns)
+        self.dtypes = MappingProxyType(self.df.dtypes.to_dict())
+
     def validate_code(self, code: str) -> None:
         """
-        Check if code contains forbidden patterns
+        Check if code contains forbidden patterns or constructs
+
+        Two layers: a single pattern scan of the source text, then an AST
+        check of the parsed code (which also compiles it, ready for execute).
         
         Args:
             code: Python code string to validate
             
         Raises:
             CodeExecutionError: If code contains dangerous patterns
+            SyntaxError: If code doesn't parse
         """
-        code_lower = code.lower()
-        
-        # Check for forbidden patterns
-        for pattern in self.FORBIDDEN_PATTERNS:
-            if re.search(pattern, code, re.IGNORECASE):
-                raise CodeExecutionError(
-                    f"Code contains forbidden pattern: {pattern}. "
-                    "Only pandas/numpy operations are allowed."
-                )
-        
-        # Check for suspicious keywords
-        dangerous_keywords = ['import os', 'import sys', 'import subprocess', 'from os']
-        for keyword in dangerous_keywords:
-            if keyword in code_lower:
-                raise CodeExecutionError(
-                    f"Forbidden import detected: {keyword}"
-                )
+        self._prepare(code)
+
+    def _prepare(self, code: str) -> CodeType:
+        """
+        Validate and compile a snippet, through the shared cache
+
+        Returns:
+            Code object of the snippet function
+
+        Raises:
+            CodeExecutionError: If code contains dangerous patterns
+            SyntaxError: If code doesn't parse
+        """
+        code_obj, violation = self._prepare_cached(code)
+        if violation is not None:
+            raise CodeExecutionError(violation)
+        return code_obj
+
+    @classmethod
+    @lru_cache(maxsize=CODE_CACHE_SIZE)
+    def _prepare_cached(cls, code: str) -> Tuple[Optional[CodeType], Optional[str]]:
+        """
+        Pattern scan, AST check and compile, cached as one entry per snippet.
+
+        The cache is process-wide (every executor shares it) and keyed on the
+        class too, so a subclass with a different policy never sees entries
+        validated under another. Rejections are cached as well; only
+        SyntaxErrors propagate uncached.
+
+        Returns:
+            (code object, None) or (None, violation message)
+        """
+        violation = cls._find_violation(code)
+        if violation is None:
+            try:
+                return _compile_snippet(code), None
+            except CodeExecutionError as e:
+                violation = str(e)
+        return None, violation
+
+    @classmethod
+    def _find_violation(cls, code: str) -> Optional[str]:
+        """
+        Scan code for forbidden patterns in a single pass
+
+        Returns:
+            Description of the first violation found, or None if the code is clean
+        """
+        # One scan for forbidden patterns and suspicious imports alike
+        if cls._HS_DB is not None:
+            rule_id = cls._scan_hyperscan(code)
+        else:
+            match = cls._FORBIDDEN_RE.search(code)
+            rule_id = int(match.lastgroup[1:]) if match else None
+
+        if rule_id is None:
+            return None
+        if rule_id < len(cls.FORBIDDEN_PATTERNS):
+            pattern = cls.FORBIDDEN_PATTERNS[rule_id]
+            return (
+                f"Code contains forbidden pattern: {pattern}. "
+                "Only pandas/numpy operations are allowed."
+            )
+        return f"Forbidden import detected: {cls._IMPORT_NAMES[rule_id - len(cls.FORBIDDEN_PATTERNS)]}"
     
+    @classmethod
+    def _scan_hyperscan(cls, code: str) -> Optional[int]:
+        """
+        Scan code against all forbidden patterns in one pass
+
+        Returns:
+            Index of the first forbidden pattern found, or None
+        """
+        scratch = getattr(_HS_LOCAL, 'scratch', None)
+        if scratch is None:
+            scratch = _HS_LOCAL.scratch = hyperscan.Scratch(cls._HS_DB)
+
+        hits = []
+
+        def on_match(pattern_id, start, end, flags, context):
+            hits.append(pattern_id)
+            return True  # Stop at the first hit
+
+        try:
+            cls._HS_DB.scan(code.encode(), match_event_handler=on_match, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            pass
+        return hits[0] if hits else None
+
+    def _run(self, code_obj: CodeType) -> Any:
+        """
+        Execution backend: run a validated, compiled snippet and return its result
+
+        This is the only step that touches the interpreter, so a deployment can
+        override it (e.g. to hand snippets to a worker process) while validation,
+        caching, output capture and timeouts stay in execute().
+
+        Args:
+            code_obj: Snippet function code from _prepare()
+
+        Returns:
+            The expression's value, or the snippet's `result` (None if unset)
+        """
+        # Bind the snippet to restricted globals (fresh per run so executions never share variables).
+        # df is a copy-on-write view: snippets that add or modify columns change
+        # only their own copy, never the cached dataset.
+        snippet = FunctionType(code_obj, dict(self.BASE_NAMESPACE))
+        return snippet(self.df.copy(deep=False), pd, pd, np, np, self.cols, self.dtypes)
+
     def execute(self, code: str) -> Dict[str, Any]:
         """
         Execute code in sandboxed environment
+
+        The answer is whatever the code prints, or else the value of a single
+        expression, or else the variable `result` (the convention the analyst
+        prompt asks for).
         
         Args:
             code: Python code string (assumes 'df' is available)
@@ -93,83 +547,69 @@ class SecureCodeExecutor:
         Returns:
             dict with keys: success, output, error, execution_time_ms, code_executed
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            # Security validation
-            self.validate_code(code)
+            # Security validation and compile (one cache lookup per snippet)
+            code_obj = self._prepare(code)
             
-            # Prepare restricted namespace
-            namespace = {
-                'df': self.df,
-                'pd': pd,
-                'pandas': pd,
-            }
+            # Execute code, capturing this thread's stdout (restored even if the code raises)
+            captured_output = StringIO()
+            with _capture_stdout(captured_output), _time_limit(self.TIMEOUT_SECONDS):
+                exec_result = self._run(code_obj)
             
-            # Try importing numpy if code uses it
-            if 'numpy' in code or 'np' in code:
-                import numpy as np
-                namespace['np'] = np
-                namespace['numpy'] = np
+            # Get captured output
+            output = captured_output.getvalue()
             
-            # Capture stdout
-            old_stdout = sys.stdout
-            sys.stdout = captured_output = StringIO()
+            # If no print output, report the result value
+            if not output and exec_result is not None:
+                output = self._render(exec_result)
             
-            try:
-                # Execute code
-                exec_result = None
-                exec(code, namespace)
-                
-                # If code has a return statement or final expression, capture it
-                if 'result' in namespace:
-                    exec_result = namespace['result']
-                
-                # Get captured output
-                output = captured_output.getvalue()
-                
-                # If no print output, try to get last expression value
-                if not output and exec_result is not None:
-                    output = str(exec_result)
-                elif not output:
-                    # Try to find a variable that looks like a result
-                    for key in namespace:
-                        if key not in ['df', 'pd', 'pandas', 'np', 'numpy', '__builtins__']:
-                            output = str(namespace[key])
-                            break
-                
-            finally:
-                sys.stdout = old_stdout
+            if len(output) > self.MAX_OUTPUT_CHARS:
+                output = output[:self.MAX_OUTPUT_CHARS] + f"\n... [truncated, total {len(output)} chars]"
             
-            execution_time = (time.time() - start_time) * 1000
+            return self._result(
+                code, start_ns,
+                output=output.strip() if output else "Code executed successfully (no output)"
+            )
             
-            return {
-                'success': True,
-                'output': output.strip() if output else "Code executed successfully (no output)",
-                'error': None,
-                'execution_time_ms': round(execution_time, 2),
-                'code_executed': code
-            }
+        except (ExecutionTimeoutError, _SnippetTimeout):
+            # _SnippetTimeout only escapes _time_limit if it lands during its cleanup
+            return self._result(code, start_ns, error=f"Execution timed out after {self.TIMEOUT_SECONDS} seconds")
             
         except CodeExecutionError as e:
-            execution_time = (time.time() - start_time) * 1000
-            return {
-                'success': False,
-                'output': None,
-                'error': f"Security violation: {str(e)}",
-                'execution_time_ms': round(execution_time, 2),
-                'code_executed': code
-            }
+            return self._result(code, start_ns, error=f"Security violation: {str(e)}")
             
         except Exception as e:
-            execution_time = (time.time() - start_time) * 1000
-            return {
-                'success': False,
-                'output': None,
-                'error': f"{type(e).__name__}: {str(e)}",
-                'execution_time_ms': round(execution_time, 2),
-                'code_executed': code
-            }
+            return self._result(code, start_ns, error=f"{type(e).__name__}: {str(e)}")
+
+    def _render(self, value: Any) -> str:
+        """
+        Text for a snippet's result value
+
+        Frames and series are rendered with explicit bounds rather than through
+        pandas display options, which are process-wide.
+        """
+        if isinstance(value, pd.DataFrame):
+            return value.to_string(
+                max_rows=self.DISPLAY_MAX_ROWS, max_cols=self.DISPLAY_MAX_COLUMNS,
+                line_width=self.DISPLAY_WIDTH, show_dimensions='truncate'
+            )
+        if isinstance(value, pd.Series):
+            return value.to_string(max_rows=self.DISPLAY_MAX_ROWS, name=True, dtype=True, length='truncate')
+        return str(value)
+
+    @staticmethod
+    def _result(code: str, start_ns: int, output: Optional[str] = None,
+                error: Optional[str] = None) -> Dict[str, Any]:
+        """Build the execute() result dict; success is the absence of an error."""
+        return {
+            'success': error is None,
+            'output': output,
+            'error': error,
+            'execution_time_ms': _elapsed_ms(start_ns),
+            'code_executed': code
+        }
 
 
 # Helper function for testing
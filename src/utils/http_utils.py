@@ -0,0 +1,50 @@
+"""
+HTTP helpers shared by the API routers
+"""
+
+import azure.functions as func
+import httpx
+import orjson
+from typing import Any
+from pydantic import BaseModel
+
+# Outbound (threat-intel) HTTP settings: fail fast on connect, keep pooled connections warm
+OUTBOUND_TIMEOUT = httpx.Timeout(connect=2.0, read=5.0, write=5.0, pool=5.0)
+OUTBOUND_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+
+
+def new_http_client() -> httpx.AsyncClient:
+    """HTTP/2 client with the shared outbound timeout and pool limits"""
+    return httpx.AsyncClient(http2=True, timeout=OUTBOUND_TIMEOUT, limits=OUTBOUND_LIMITS)
+
+
+def _model_fragment(obj: Any) -> orjson.Fragment:
+    """orjson fallback: embed models nested in a dict/list as pre-serialized JSON"""
+    if isinstance(obj, BaseModel):
+        return orjson.Fragment(obj.__pydantic_serializer__.to_json(obj))
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def json_response(payload: Any, status_code: int = 200) -> func.HttpResponse:
+    """
+    Build a JSON HttpResponse
+
+    Pydantic models are serialized straight to bytes by pydantic-core's Rust
+    serializer; anything else (dicts, lists) goes through orjson, with any
+    models nested inside serialized by pydantic-core as well. Bytes are
+    taken as already-serialized JSON and sent as-is.
+
+    Args:
+        payload: Pydantic model, JSON bytes, or JSON-serializable object
+        status_code: HTTP status code
+
+    Returns:
+        func.HttpResponse with an application/json body
+    """
+    if isinstance(payload, bytes):
+        body = payload
+    elif isinstance(payload, BaseModel):
+        body = payload.__pydantic_serializer__.to_json(payload)
+    else:
+        body = orjson.dumps(payload, default=_model_fragment)
+    return func.HttpResponse(body=body, status_code=status_code, mimetype="application/json")
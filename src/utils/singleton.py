@@ -0,0 +1,32 @@
+"""
+Process-wide singleton helper for service getters
+"""
+
+import threading
+from functools import wraps
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Decorate a zero-argument getter so its instance is built exactly once.
+
+    Unlike functools.lru_cache, which can run the factory twice when two
+    threads miss at the same time, construction is serialized by a lock
+    (double-checked, so the fast path after creation takes no lock).
+    """
+    lock = threading.Lock()
+    instance = None
+
+    @wraps(factory)
+    def get() -> T:
+        nonlocal instance
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+
+    return get
@@ -0,0 +1,14 @@
+"""
+Shared test setup
+
+The agents and services build their SDK clients from environment variables
+at construction time; these placeholders let them be constructed offline.
+"""
+
+import os
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test-key")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://test.openai.azure.com")
+os.environ.setdefault("COSMOS_ENDPOINT", "https://test.documents.azure.com:443/")
+os.environ.setdefault("COSMOS_KEY", "dGVzdA==")
+os.environ.pop("ABUSEIPDB_API_KEY", None)  # Intel lookups use the Mock DB
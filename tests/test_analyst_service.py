@@ -0,0 +1,58 @@
+"""Tests for AnalystService dataset loading and the Parquet cache"""
+
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.services.analyst_service import AnalystService
+
+
+def _write_csv(path):
+    pd.DataFrame({
+        "source_port": [1, 2],
+        "dest_port": [80, 443],
+        "http_status": [200, 403],
+        "protocol": ["TCP", "TCP"],
+        "action": ["ALLOW", "BLOCK"],
+        "alert_type": ["benign", "sql_injection"],
+    }).to_csv(path, index=False)
+
+
+def test_parquet_cache_is_written_and_reused(tmp_path):
+    csv_path = tmp_path / "logs.csv"
+    _write_csv(csv_path)
+    service = AnalystService()
+
+    first = service._read_dataset(csv_path)
+    parquet_path = tmp_path / "logs.parquet"
+    assert parquet_path.exists()
+    assert not list(tmp_path.glob("*.tmp"))
+    assert pq.read_schema(parquet_path).metadata[AnalystService.PARQUET_SCHEMA_KEY]
+
+    # Empty the CSV (unparseable) but keep the cache newer: the second read must come from Parquet
+    csv_path.write_text("")
+    os.utime(parquet_path, (csv_path.stat().st_mtime + 1,) * 2)
+    second = service._read_dataset(csv_path)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_parquet_cache_is_invalidated_by_dtype_changes(tmp_path, monkeypatch):
+    csv_path = tmp_path / "logs.csv"
+    _write_csv(csv_path)
+    AnalystService()._read_dataset(csv_path)
+
+    monkeypatch.setattr(AnalystService, "CSV_DTYPES", {**AnalystService.CSV_DTYPES, "source_port": "int64"})
+    reloaded = AnalystService()._read_dataset(csv_path)
+
+    assert reloaded["source_port"].dtype == "int64"
+
+
+def test_corrupt_parquet_cache_falls_back_to_csv(tmp_path):
+    csv_path = tmp_path / "logs.csv"
+    _write_csv(csv_path)
+    service = AnalystService()
+    service._read_dataset(csv_path)
+    (tmp_path / "logs.parquet").write_bytes(b"truncated")
+
+    assert len(service._read_dataset(csv_path)) == 2
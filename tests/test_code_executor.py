@@ -0,0 +1,67 @@
+"""Tests for the sandboxed analyst code executor"""
+
+import threading
+
+import pandas as pd
+import pytest
+
+from src.utils.code_executor import SecureCodeExecutor
+
+
+class _FastTimeoutExecutor(SecureCodeExecutor):
+    TIMEOUT_SECONDS = 0.5
+
+
+@pytest.fixture
+def executor():
+    return _FastTimeoutExecutor(pd.DataFrame({"alert_type": ["benign", "sql_injection", "benign"]}))
+
+
+def test_result_and_printed_output(executor):
+    assert executor.execute("result = int((df['alert_type'] == 'benign').sum())")["output"] == "2"
+    assert executor.execute("print(len(df))")["output"] == "3"
+    assert executor.execute("df.shape")["output"] == "(3, 1)"
+
+
+@pytest.mark.parametrize("code", [
+    "eval('1')",
+    "f = eval\nf('1')",
+    "open('/etc/passwd')",
+    "__import__('os')",
+    "import os",
+    "from subprocess import run",
+    "df.__class__",
+    "().__class__.__bases__",
+])
+def test_forbidden_code_is_rejected(executor, code):
+    result = executor.execute(code)
+    assert not result["success"]
+    assert result["error"].startswith("Security violation")
+
+
+@pytest.mark.parametrize("code", [
+    "while True:\n    pass",
+    "try:\n    while True:\n        pass\nexcept Exception as err:\n    result = 'caught'",
+    "while True:\n    try:\n        x = 1\n    except Exception:\n        pass",
+    "try:\n    while True:\n        pass\nexcept:\n    result = 'swallowed'",
+])
+def test_timeout_cannot_be_swallowed(executor, code):
+    result = executor.execute(code)
+    assert not result["success"]
+    assert result["error"] == "Execution timed out after 0.5 seconds"
+
+
+def test_timeout_in_worker_thread(executor):
+    results = []
+    worker = threading.Thread(target=lambda: results.append(executor.execute("while True:\n    pass")))
+    worker.start()
+    worker.join(timeout=5)
+
+    assert results and results[0]["error"] == "Execution timed out after 0.5 seconds"
+    # The thread's stdout capture was released and later runs still work
+    assert executor.execute("print('ok')")["output"] == "ok"
+
+
+def test_snippets_do_not_modify_the_dataset(executor):
+    executor.execute("df['alert_type'] = 'x'\ndf.drop(0, inplace=True)")
+    assert list(executor.df["alert_type"]) == ["benign", "sql_injection", "benign"]
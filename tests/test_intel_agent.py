@@ -0,0 +1,48 @@
+"""Tests for IntelAgent bulk lookups"""
+
+import asyncio
+
+from src.agents.intel_agent import IntelAgent
+from src.agents.manager_agent import ManagerAgent
+from src.models.intel_models import IPReputationResponse
+from src.models.manager_models import AgentTask
+
+
+async def _lookup_ips(ips):
+    agent = IntelAgent()
+    try:
+        return await agent.lookup_ips(ips)
+    finally:
+        await agent.aclose()
+
+
+def test_lookup_ips_isolates_invalid_addresses():
+    results = asyncio.run(_lookup_ips(["8.8.8.8", "not-an-ip", "89.248.172.16", "10.0.0.1:22"]))
+
+    assert len(results) == 4
+    assert isinstance(results[0], IPReputationResponse)
+    assert results[0].reputation == "benign"
+    assert results[1] == {"ip_address": "not-an-ip", "error": results[1]["error"]}
+    assert isinstance(results[2], IPReputationResponse)
+    assert results[2].reputation == "malicious"
+    assert results[3]["ip_address"] == "10.0.0.1:22" and results[3]["error"]
+
+
+def test_lookup_ips_keeps_input_order_with_duplicates():
+    results = asyncio.run(_lookup_ips(["1.1.1.1", "8.8.8.8", "1.1.1.1"]))
+
+    assert [str(r.ip_address) for r in results] == ["1.1.1.1", "8.8.8.8", "1.1.1.1"]
+
+
+def test_coalesce_ip_lookups_merges_ips_and_reasoning():
+    tasks = [
+        AgentTask(agent="analyst", action="analyze_logs", params={"query": "q"}, reasoning="volume"),
+        AgentTask(agent="intel", action="lookup_ip", params={"ip_address": "8.8.8.8"}, reasoning="source"),
+        AgentTask(agent="intel", action="lookup_ip", params={"ip_address": "bad"}, reasoning="target"),
+    ]
+
+    coalesced = ManagerAgent()._coalesce_ip_lookups(tasks)
+
+    assert [t.action for t in coalesced] == ["analyze_logs", "lookup_ips"]
+    assert coalesced[1].params == {"ip_addresses": ["8.8.8.8", "bad"]}
+    assert coalesced[1].reasoning == "source target"
@@ -0,0 +1,93 @@
+"""Tests for the write-behind investigation state writer"""
+
+import asyncio
+
+import pytest
+
+from src.services.investigation_service import _StateWriter
+
+
+class _State:
+    id = "inv-1"
+
+    def __init__(self):
+        self.tasks_history = []
+
+
+class _FakeCosmos:
+    """Records writes; patches fail while fail_patches > 0"""
+
+    def __init__(self, fail_patches=0, fail_upserts=0):
+        self.fail_patches = fail_patches
+        self.fail_upserts = fail_upserts
+        self.calls = []
+
+    async def patch_investigation(self, state, new_entries, fields):
+        self.calls.append(("patch", list(new_entries), sorted(fields)))
+        if self.fail_patches:
+            self.fail_patches -= 1
+            raise RuntimeError("patch failed")
+
+    async def update_investigation(self, state):
+        self.calls.append(("upsert", list(state.tasks_history), []))
+        if self.fail_upserts:
+            self.fail_upserts -= 1
+            raise RuntimeError("upsert failed")
+
+
+def test_patches_only_new_entries_and_named_fields():
+    async def scenario():
+        state, cosmos = _State(), _FakeCosmos()
+        writer = _StateWriter(cosmos, state, debounce_seconds=0)
+        state.tasks_history.append({"task": 1})
+        writer.save("plan")
+        await writer.flush()
+        state.tasks_history.append({"task": 2})
+        writer.save("verdict", "status")
+        await writer.flush()
+        return cosmos.calls
+
+    assert asyncio.run(scenario()) == [
+        ("patch", [{"task": 1}], ["plan"]),
+        ("patch", [{"task": 2}], ["status", "verdict"]),
+    ]
+
+
+def test_failed_patch_recovers_with_full_upsert():
+    async def scenario():
+        state, cosmos = _State(), _FakeCosmos(fail_patches=1)
+        writer = _StateWriter(cosmos, state, debounce_seconds=0)
+        state.tasks_history.append({"task": 1})
+        writer.save()
+        await asyncio.sleep(0.01)
+        state.tasks_history.append({"task": 2})
+        writer.save("status")
+        await writer.flush()  # The recovery write succeeded: no stale error
+        return cosmos.calls
+
+    calls = asyncio.run(scenario())
+    assert [kind for kind, _, _ in calls] == ["patch", "upsert"]
+    assert calls[1][1] == [{"task": 1}, {"task": 2}]
+
+
+def test_flush_raises_when_last_write_failed():
+    async def scenario():
+        cosmos = _FakeCosmos(fail_patches=1)
+        writer = _StateWriter(cosmos, _State(), debounce_seconds=0)
+        writer.save("status")
+        await writer.flush()
+
+    with pytest.raises(RuntimeError, match="patch failed"):
+        asyncio.run(scenario())
+
+
+def test_flush_skips_debounce():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        writer = _StateWriter(_FakeCosmos(), _State(), debounce_seconds=5)
+        writer.save("verdict")
+        start = loop.time()
+        await writer.flush()
+        return loop.time() - start
+
+    assert asyncio.run(scenario()) < 1
@@ -0,0 +1,42 @@
+"""Tests for incremental parsing of streamed plan JSON"""
+
+import orjson
+
+from src.agents.manager_agent import _TaskStreamParser
+
+PLAN = {
+    "thought_process": "Check the {source} and \"tasks\" [first]",
+    "tasks": [
+        {"agent": "intel", "action": "lookup_ip", "params": {"ip_address": "8.8.8.8"}, "reasoning": "a } brace"},
+        {"agent": "analyst", "action": "analyze_logs", "params": {"query": "say \"hi\" [x]"}, "reasoning": "b"},
+    ],
+}
+
+
+def _feed_in_chunks(text, size):
+    parser = _TaskStreamParser()
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return completed
+
+
+def test_tasks_complete_regardless_of_chunk_boundaries():
+    text = orjson.dumps(PLAN).decode()
+    for size in (1, 2, 3, 7, 64, len(text)):
+        assert _feed_in_chunks(text, size) == PLAN["tasks"]
+
+
+def test_each_task_is_returned_as_soon_as_it_closes():
+    text = orjson.dumps(PLAN).decode()
+    first_end = text.index('"a } brace"}') + len('"a } brace"}')
+    parser = _TaskStreamParser()
+
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == [PLAN["tasks"][0]]
+    assert parser.feed(text[first_end:]) == [PLAN["tasks"][1]]
+
+
+def test_objects_outside_the_tasks_array_are_ignored():
+    text = orjson.dumps({"meta": {"tasks": [{"x": 1}]}, "tasks": [], "extra": [{"y": 2}]}).decode()
+    assert _feed_in_chunks(text, 5) == []